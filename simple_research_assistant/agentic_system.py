@@ -1,75 +1,53 @@
 """
-Research Orchestrator with Autogen 0.4 RoundRobin GroupChat
-- Uses RoundRobinGroupChat for agent coordination
+Research Orchestrator with Autogen 0.4 model client
+- Each agent is a system prompt sent straight to the model client
 - Independent operations (no workflow required)
 - Working agents with proper async handling
 """
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Hashable
 import asyncio
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.conditions import TextMentionTermination, MaxMessageTermination
+import hashlib
+import io
+import json
+import logging
+import random
+import threading
+import httpx
+from openai import APIConnectionError, APITimeoutError, AsyncAzureOpenAI, RateLimitError
 from autogen_ext.models import AzureOpenAIChatCompletionClient
-from autogen_core.components.models import UserMessage
+from autogen_core.components.models import SystemMessage, UserMessage
 
+from cache_utils import TTLCache
 from config import config
-from pubmed_utils import search_pubmed
+from pubmed_utils import asearch_pubmed_many, search_pubmed
+from token_utils import count_tokens, truncate_tokens
 
+logger = logging.getLogger(__name__)
 
-class ResearchOrchestrator:
-    """
-    Autogen 0.4 Research Orchestrator with RoundRobin GroupChat
-    - Each function works independently
-    - Agents coordinate via RoundRobin pattern
-    - Direct API calls where possible for speed
-    """
-    
-    def __init__(self):
-        """Initialize orchestrator with Autogen 0.4 agents"""
-        print("🤖 Initializing Autogen 0.4 Research Orchestrator...")
-        
-        # Create Azure OpenAI client
-        self.model_client = AzureOpenAIChatCompletionClient(
-            azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
-            api_key=config.AZURE_OPENAI_API_KEY,
-            api_version=config.AZURE_OPENAI_API_VERSION,
-            model=config.AZURE_OPENAI_DEPLOYMENT,
-            model_capabilities={
-                "vision": False,
-                "function_calling": True,
-                "json_output": True,
-            }
-        )
-        
-        # Create agents
-        self._create_agents()
-        
-        print("✅ Autogen 0.4 Orchestrator initialized with RoundRobin GroupChat")
-    
-    def _create_agents(self):
-        """Create all Autogen 0.4 agents"""
-        
-        # Literature Agent - Searches and retrieves papers
-        self.literature_agent = AssistantAgent(
-            name="LiteratureAgent",
-            model_client=self.model_client,
-            system_message="""You are a Literature Search Agent.
+# Separates the synthesis and extensions sections of a fused reply
+EXTENSIONS_DELIMITER = "===EXTENSIONS==="
+
+# Transient Azure failures worth retrying (429s, timeouts, dropped connections)
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, asyncio.TimeoutError)
+
+# Agent system prompts. These are sent verbatim on every call and must stay
+# byte-identical (no topics, dates or other interpolated values) so Azure can
+# serve them from its prompt cache; all per-request content goes at the end
+# of the user message instead.
+SYSTEM_PROMPTS: Dict[str, str] = {
+    # Literature Agent - Searches and retrieves papers
+    "literature": """You are a Literature Search Agent.
 Your role: Search PubMed for research papers and format the results.
 
 When given a topic:
 1. Acknowledge the search request
 2. Format the papers clearly with titles, authors, journals, dates, and links
 3. Provide a count of papers found
-4. End your message with: LITERATURE_COMPLETE
 
-Be concise and structured."""
-        )
-        
-        # Synthesis Agent - Summarizes papers
-        self.synthesis_agent = AssistantAgent(
-            name="SynthesisAgent",
-            model_client=self.model_client,
-            system_message="""You are a Paper Synthesis Agent.
+Be concise and structured.""",
+    
+    # Synthesis Agent - Summarizes papers
+    "synthesis": """You are a Paper Synthesis Agent.
 Your role: Summarize research papers concisely.
 
 For each paper:
@@ -78,16 +56,11 @@ For each paper:
 - Significance (1 sentence)
 
 Format: Paper 1: [summary], Paper 2: [summary], ...
-End your message with: SYNTHESIS_COMPLETE
 
-Be clear and concise."""
-        )
-        
-        # Extensions Agent - Proposes future research
-        self.extensions_agent = AssistantAgent(
-            name="ExtensionsAgent",
-            model_client=self.model_client,
-            system_message="""You are a Research Extensions Agent.
+Be clear and concise.""",
+    
+    # Extensions Agent - Proposes future research
+    "extensions": """You are a Research Extensions Agent.
 Your role: Propose future research directions based on current papers.
 
 Generate 3 future research directions:
@@ -97,16 +70,11 @@ Generate 3 future research directions:
 4. Difficulty (Easy/Medium/Hard)
 
 Format clearly with numbers.
-End your message with: EXTENSIONS_COMPLETE
 
-Be innovative and specific."""
-        )
-        
-        # Explainer Agent - Explains concepts
-        self.explainer_agent = AssistantAgent(
-            name="ExplainerAgent",
-            model_client=self.model_client,
-            system_message="""You are a Concept Explainer Agent.
+Be innovative and specific.""",
+    
+    # Explainer Agent - Explains concepts
+    "explainer": """You are a Concept Explainer Agent.
 Your role: Explain complex concepts in simple terms.
 
 Include:
@@ -115,15 +83,33 @@ Include:
 3. One analogy
 4. Why it matters
 
-Max 200 words. Be clear and accessible.
-End your message with: EXPLANATION_COMPLETE"""
-        )
-        
-        # Advisor Agent - Checks paper formatting
-        self.advisor_agent = AssistantAgent(
-            name="AdvisorAgent",
-            model_client=self.model_client,
-            system_message="""You are a Paper Formatting Advisor Agent.
+Max 200 words. Be clear and accessible.""",
+    
+    # Research Agent - Synthesis + Extensions fused into one turn
+    "research": f"""You are a Research Synthesis and Extensions Agent.
+Your role: Summarize research papers, then propose future research directions.
+
+Task 1 - for each paper:
+- Main finding (1 sentence)
+- Method used (1 sentence)
+- Significance (1 sentence)
+
+Format: Paper 1: [summary], Paper 2: [summary], ...
+
+After Task 1, write a line containing only: {EXTENSIONS_DELIMITER}
+
+Task 2 - generate 3 future research directions:
+1. Title (brief)
+2. Description (2 sentences)
+3. Solution approach (1 sentence)
+4. Difficulty (Easy/Medium/Hard)
+
+Format clearly with numbers.
+
+Be concise, innovative and specific.""",
+    
+    # Advisor Agent - Checks paper formatting
+    "advisor": """You are a Paper Formatting Advisor Agent.
 Your role: Review research papers for proper formatting.
 
 Check for:
@@ -137,10 +123,144 @@ Check for:
 Provide:
 - Score (0-100)
 - Missing sections
-- 3 quick recommendations
+- 3 quick recommendations""",
+}
+
+# Reply length cap per agent. Each agent answers in a single turn, so the
+# cap is what ends a turn once the requested format is complete instead of
+# letting the model keep elaborating
+AGENT_MAX_TOKENS: Dict[str, int] = {
+    "literature": 1000,
+    "synthesis": 200,
+    "extensions": 600,
+    "explainer": 350,
+    "research": 1400,
+    "advisor": 500,
+}
 
-End your message with: ADVISOR_COMPLETE"""
+
+class ResearchOrchestrator:
+    """
+    Autogen 0.4 Research Orchestrator
+    - Each function works independently
+    - One model_client.create() call per agent turn (no group chat overhead)
+    - Direct API calls where possible for speed
+    """
+    
+    # Attempts per LLM call before giving up (or switching to the fallback)
+    MAX_LLM_ATTEMPTS = 3
+    
+    # Token budgets for paper text sent to the agents
+    AGENT_ABSTRACT_TOKENS = 50
+    SYNTHESIS_ABSTRACT_TOKENS = 80
+    LITERATURE_PROMPT_TOKENS = 1500
+    
+    # Seconds between Azure Batch API status checks
+    BATCH_POLL_SECONDS = 30
+    
+    # Connection pool bounds for the shared HTTP client
+    HTTP_MAX_CONNECTIONS = 64
+    HTTP_MAX_KEEPALIVE = 32
+    
+    def __init__(self):
+        """Initialize orchestrator with Autogen 0.4 agents"""
+        logger.info("Initializing Autogen 0.4 Research Orchestrator")
+        
+        # One bounded keep-alive pool shared by every Azure client below,
+        # so agent calls reuse open TLS connections
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=self.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=self.HTTP_MAX_KEEPALIVE
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        
+        # Create Azure OpenAI client
+        self.model_client = self._create_model_client(
+            config.AZURE_OPENAI_ENDPOINT,
+            config.AZURE_OPENAI_API_KEY,
+            config.AZURE_OPENAI_DEPLOYMENT
         )
+        
+        # Optional secondary deployment for 429 / timeout overflow
+        self._fallback_client = None
+        if config.AZURE_OPENAI_FALLBACK_DEPLOYMENT:
+            self._fallback_client = self._create_model_client(
+                config.AZURE_OPENAI_FALLBACK_ENDPOINT,
+                config.AZURE_OPENAI_FALLBACK_API_KEY,
+                config.AZURE_OPENAI_FALLBACK_DEPLOYMENT
+            )
+        self.fallback_count = 0
+        
+        # Caps concurrent LLM calls across all methods so fan-out
+        # cannot overrun the deployment's rate limits
+        self._sem = asyncio.Semaphore(config.AZURE_MAX_CONCURRENCY)
+        
+        # Plain OpenAI SDK client for the Batch API (created on first use)
+        self._batch_client = None
+        
+        # Cache of finished results for repeated identical requests
+        self._cache = TTLCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS)
+        
+        # Pending work shared by concurrent identical requests
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        
+        # Create agents
+        self._create_agents()
+        
+        logger.info("Autogen 0.4 Orchestrator initialized")
+    
+    async def warmup(self):
+        """
+        Send a 1-token request so the connection pool is open and the
+        deployment is warm before the first real request arrives
+        """
+        try:
+            await self.model_client.create(
+                [UserMessage(content="ping", source="user")],
+                extra_create_args={"max_tokens": 1}
+            )
+            logger.info("Model client warmed up")
+        except Exception as e:
+            logger.warning("Warmup failed: %s", e)
+    
+    async def aclose(self):
+        """Close the shared HTTP connection pool (call on app shutdown)"""
+        await self._http.aclose()
+    
+    def _create_model_client(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str
+    ) -> AzureOpenAIChatCompletionClient:
+        """Create an Autogen Azure OpenAI client for one deployment"""
+        return AzureOpenAIChatCompletionClient(
+            azure_endpoint=endpoint,
+            api_key=api_key,
+            api_version=config.AZURE_OPENAI_API_VERSION,
+            model=deployment,
+            http_client=self._http,
+            # Retries are done by _call_with_retry (bounded, with jitter);
+            # SDK retries underneath would multiply the attempts
+            max_retries=0,
+            model_capabilities={
+                "vision": False,
+                "function_calling": True,
+                "json_output": True,
+            }
+        )
+    
+    def _create_agents(self):
+        """Build the system message for each agent"""
+        # Agents are stateless (one prompt, one response), so build each
+        # agent's system message once and reuse it on every call
+        self._system_messages = {
+            agent: SystemMessage(content=prompt)
+            for agent, prompt in SYSTEM_PROMPTS.items()
+        }
     
     async def search_literature(
         self, 
@@ -160,13 +280,33 @@ End your message with: ADVISOR_COMPLETE"""
         Returns:
             Literature results
         """
-        print(f"🔍 [LiteratureAgent] Searching PubMed for: {topic}")
+        logger.info("[LiteratureAgent] Searching PubMed for: %s", topic)
+        
+        cache_key = ("lit", topic.lower().strip(), max_papers)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
         
+        # Concurrent identical searches share one PubMed + agent run
+        return await self._coalesce(
+            cache_key,
+            lambda: self._search_literature(topic, max_papers, progress_callback, cache_key)
+        )
+    
+    async def _search_literature(
+        self,
+        topic: str,
+        max_papers: int,
+        progress_callback: Optional[Callable],
+        cache_key: Hashable
+    ) -> Dict[str, Any]:
+        """Uncached body of search_literature"""
         if progress_callback:
             progress_callback("Searching for papers", 20)
         
-        # Direct PubMed search (fast, reliable)
-        papers = search_pubmed(topic, max_papers)
+        # Direct PubMed search (fast, reliable) - run the blocking HTTP
+        # calls in a worker thread so the event loop keeps serving requests
+        papers = await asyncio.to_thread(search_pubmed, topic, max_papers)
         
         if not papers:
             return {
@@ -178,45 +318,42 @@ End your message with: ADVISOR_COMPLETE"""
         if progress_callback:
             progress_callback("Formatting results", 30)
         
-        # Format papers with LiteratureAgent
+        # Format papers with LiteratureAgent; drop the lowest-priority
+        # fields (link, DOI) if the listing would blow the token budget
         papers_text = self._format_papers_for_agent(papers)
+        if count_tokens(papers_text) > self.LITERATURE_PROMPT_TOKENS:
+            papers_text = self._format_papers_for_agent(papers, include_links=False)
         
-        # Use agent to format output
+        # Use agent to format output (the plain fallback is not cached, so
+        # a transient agent failure doesn't stick for the whole TTL)
+        degraded = False
         try:
-            # Create single-agent "team" for independent operation
-            termination = TextMentionTermination("LITERATURE_COMPLETE") | MaxMessageTermination(3)
-            
-            team = RoundRobinGroupChat(
-                [self.literature_agent],
-                termination_condition=termination
-            )
-            
-            # Run agent
-            message = f"""Format these {len(papers)} research papers clearly:
+            message = f"""Format these research papers clearly. Provide a structured list with all details.
 
-{papers_text}
+Papers found: {len(papers)}
 
-Provide a structured list with all details."""
-            
-            result = await team.run(task=UserMessage(content=message, source="user"))
+{papers_text}"""
             
-            # Extract formatted output
-            formatted = self._extract_agent_response(result)
+            formatted = await self._ask("literature", message)
             
         except Exception as e:
-            print(f"⚠️ Agent formatting failed, using fallback: {e}")
+            logger.warning("Agent formatting failed, using fallback: %s", e)
             formatted = self._format_papers(papers)
+            degraded = True
         
         if progress_callback:
             progress_callback("Papers retrieved", 40)
         
-        print(f"✅ [LiteratureAgent] Found {len(papers)} papers")
+        logger.info("[LiteratureAgent] Found %d papers", len(papers))
         
-        return {
+        result = {
             "papers": papers,
             "formatted": formatted,
             "count": len(papers)
         }
+        if not degraded:
+            self._cache.set(cache_key, result)
+        return result
     
     async def synthesize_papers(
         self,
@@ -236,48 +373,33 @@ Provide a structured list with all details."""
         if not papers:
             return {"synthesis": "No papers to synthesize", "summaries": []}
         
-        print(f"📖 [SynthesisAgent] Synthesizing {len(papers)} papers...")
+        logger.info("[SynthesisAgent] Synthesizing %d papers", len(papers))
         
         if progress_callback:
             progress_callback("Synthesizing papers", 60)
         
         try:
-            # Create papers text
-            papers_text = "\n\n".join([
-                f"Paper {i}: {p['title']}\nAbstract: {p.get('abstract', 'N/A')[:300]}"
+            # Papers are summarized independently, so fan out one
+            # SynthesisAgent call per paper instead of one big prompt
+            summaries = await asyncio.gather(*[
+                self._ask("synthesis", self._synthesis_message(i, p))
                 for i, p in enumerate(papers, 1)
             ])
             
-            # Use SynthesisAgent
-            termination = TextMentionTermination("SYNTHESIS_COMPLETE") | MaxMessageTermination(3)
-            
-            team = RoundRobinGroupChat(
-                [self.synthesis_agent],
-                termination_condition=termination
-            )
-            
-            message = f"""Summarize these {len(papers)} research papers:
-
-{papers_text}
-
-Provide concise summaries for each paper."""
-            
-            result = await team.run(task=UserMessage(content=message, source="user"))
-            
-            synthesis = self._extract_agent_response(result)
+            synthesis = "\n\n".join(summaries)
             
             if progress_callback:
                 progress_callback("Synthesis complete", 80)
             
-            print("✅ [SynthesisAgent] Synthesis complete")
+            logger.debug("[SynthesisAgent] Synthesis complete")
             
             return {
                 "synthesis": synthesis,
-                "summaries": [{"paper": i, "summary": synthesis} for i in range(len(papers))]
+                "summaries": [{"paper": i, "summary": summary} for i, summary in enumerate(summaries)]
             }
         
         except Exception as e:
-            print(f"❌ [SynthesisAgent] Error: {e}")
+            logger.error("[SynthesisAgent] Error: %s", e)
             return {
                 "synthesis": f"Error during synthesis: {str(e)}",
                 "summaries": []
@@ -286,7 +408,8 @@ Provide concise summaries for each paper."""
     async def generate_extensions(
         self,
         papers_or_synthesis: Any,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        stream_callback: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Generate research extensions using ExtensionsAgent
@@ -294,11 +417,12 @@ Provide concise summaries for each paper."""
         Args:
             papers_or_synthesis: Papers or synthesis results
             progress_callback: Optional progress callback
+            stream_callback: Optional callback receiving the text generated so far
             
         Returns:
             Research extensions
         """
-        print("🔮 [ExtensionsAgent] Generating research extensions...")
+        logger.info("[ExtensionsAgent] Generating research extensions")
         
         if progress_callback:
             progress_callback("Generating research extensions", 90)
@@ -307,33 +431,22 @@ Provide concise summaries for each paper."""
             # Extract context
             if isinstance(papers_or_synthesis, dict):
                 context = papers_or_synthesis.get('synthesis', '')
+            elif isinstance(papers_or_synthesis, list):
+                context = self._format_papers_for_agent(papers_or_synthesis, include_links=False)
             elif isinstance(papers_or_synthesis, str):
                 context = papers_or_synthesis
             else:
                 context = str(papers_or_synthesis)
             
             # Use ExtensionsAgent
-            termination = TextMentionTermination("EXTENSIONS_COMPLETE") | MaxMessageTermination(3)
-            
-            team = RoundRobinGroupChat(
-                [self.extensions_agent],
-                termination_condition=termination
-            )
-            
-            message = f"""Based on this research:
-
-{context[:1000]}
-
-Generate 3 innovative future research directions."""
+            message = self._extensions_message(context)
             
-            result = await team.run(task=UserMessage(content=message, source="user"))
-            
-            extensions = self._extract_agent_response(result)
+            extensions = await self._ask("extensions", message, on_delta=stream_callback)
             
             if progress_callback:
                 progress_callback("Extensions generated", 100)
             
-            print("✅ [ExtensionsAgent] Extensions generated")
+            logger.debug("[ExtensionsAgent] Extensions generated")
             
             return {
                 "extensions": extensions,
@@ -341,7 +454,7 @@ Generate 3 innovative future research directions."""
             }
         
         except Exception as e:
-            print(f"❌ [ExtensionsAgent] Error: {e}")
+            logger.error("[ExtensionsAgent] Error: %s", e)
             return {
                 "extensions": f"Error generating extensions: {str(e)}",
                 "count": 0
@@ -363,32 +476,21 @@ Generate 3 innovative future research directions."""
         Returns:
             Simple explanation
         """
-        print(f"💡 [ExplainerAgent] Explaining: {concept}")
+        logger.info("[ExplainerAgent] Explaining: %s", concept)
         
         try:
             # Use ExplainerAgent
-            termination = TextMentionTermination("EXPLANATION_COMPLETE") | MaxMessageTermination(3)
-            
-            team = RoundRobinGroupChat(
-                [self.explainer_agent],
-                termination_condition=termination
-            )
-            
-            message = f"""Explain the concept '{concept}' in simple terms."""
+            message = self._explain_message(concept, context)
             
-            if context:
-                message += f"\n\nContext: {context[:200]}"
+            # _ask dedupes repeated and concurrent explanations of the same concept
+            explanation = await self._ask("explainer", message)
             
-            result = await team.run(task=UserMessage(content=message, source="user"))
-            
-            explanation = self._extract_agent_response(result)
-            
-            print("✅ [ExplainerAgent] Explanation generated")
+            logger.debug("[ExplainerAgent] Explanation generated")
             
             return explanation
         
         except Exception as e:
-            print(f"❌ [ExplainerAgent] Error: {e}")
+            logger.error("[ExplainerAgent] Error: %s", e)
             return f"Error explaining concept: {str(e)}"
     
     async def check_paper(
@@ -407,60 +509,108 @@ Generate 3 innovative future research directions."""
         Returns:
             Formatting feedback
         """
-        print(f"📝 [AdvisorAgent] Checking paper: {title}")
+        logger.info("[AdvisorAgent] Checking paper: %s", title)
         
         try:
             # Only check first 1500 chars for speed
             content_preview = content[:1500]
             
             # Use AdvisorAgent
-            termination = TextMentionTermination("ADVISOR_COMPLETE") | MaxMessageTermination(3)
-            
-            team = RoundRobinGroupChat(
-                [self.advisor_agent],
-                termination_condition=termination
-            )
-            
-            message = f"""Review this research paper for formatting:
+            message = f"""Review this research paper for formatting. Check for all required sections and provide feedback.
 
 Title: {title}
 
 Content (preview):
-{content_preview}
-
-Check for all required sections and provide feedback."""
-            
-            result = await team.run(task=UserMessage(content=message, source="user"))
+{content_preview}"""
             
-            feedback = self._extract_agent_response(result)
+            feedback = await self._ask("advisor", message)
             
-            print("✅ [AdvisorAgent] Paper checked")
+            logger.debug("[AdvisorAgent] Paper checked")
             
             return {"feedback": feedback}
         
         except Exception as e:
-            print(f"❌ [AdvisorAgent] Error: {e}")
+            logger.error("[AdvisorAgent] Error: %s", e)
             return {"feedback": f"Error checking paper: {str(e)}"}
     
+    async def explain_concepts(
+        self,
+        concepts: List[str],
+        context: Optional[str] = None
+    ) -> List[str]:
+        """
+        Explain several concepts at once using ExplainerAgent
+        Calls run concurrently, bounded by AZURE_MAX_CONCURRENCY
+        
+        Args:
+            concepts: Concepts to explain
+            context: Optional context shared by all concepts
+            
+        Returns:
+            One explanation per concept, in input order
+        """
+        return await asyncio.gather(*[
+            self.explain_concept(concept, context) for concept in concepts
+        ])
+    
+    async def check_papers(self, papers: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Check several papers at once using AdvisorAgent
+        Calls run concurrently, bounded by AZURE_MAX_CONCURRENCY
+        
+        Args:
+            papers: Dicts with "title" and "content" keys
+            
+        Returns:
+            One feedback dict per paper, in input order
+        """
+        return await asyncio.gather(*[
+            self.check_paper(paper["title"], paper["content"]) for paper in papers
+        ])
+    
     async def run_full_workflow(
         self,
         topic: str,
         max_papers: int = 5,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        stream_callback: Optional[Callable[[str, str], None]] = None,
+        batch: bool = False
     ) -> Dict[str, Any]:
         """
-        Run complete workflow using RoundRobinGroupChat
+        Run complete workflow
         ALL STEPS with agent coordination
         
         Args:
             topic: Research topic
             max_papers: Max papers
             progress_callback: Progress callback
+            stream_callback: Optional callback receiving (stage, text so far)
+                while a stage's output is being generated
+            batch: Route the LLM calls through the Azure Batch API
+                (non-interactive jobs only - may take hours)
             
         Returns:
             Complete results
         """
-        print(f"\n🔬 [RoundRobin] Starting full research workflow: {topic}\n")
+        if batch:
+            results = await self.run_batch_workflow([topic], max_papers)
+            return results[0]
+        
+        # Concurrent identical workflows share one run
+        return await self._coalesce(
+            ("workflow", topic.lower().strip(), max_papers),
+            lambda: self._run_full_workflow(topic, max_papers, progress_callback, stream_callback)
+        )
+    
+    async def _run_full_workflow(
+        self,
+        topic: str,
+        max_papers: int,
+        progress_callback: Optional[Callable],
+        stream_callback: Optional[Callable[[str, str], None]]
+    ) -> Dict[str, Any]:
+        """Body of run_full_workflow (one run per distinct in-flight request)"""
+        logger.info("[Workflow] Starting full research workflow: %s", topic)
         
         # Step 1: Literature (LiteratureAgent)
         lit_result = await self.search_literature(topic, max_papers, progress_callback)
@@ -474,78 +624,468 @@ Check for all required sections and provide feedback."""
                 "status": "completed_with_no_results"
             }
         
-        # Step 2: Synthesis (SynthesisAgent)
-        syn_result = await self.synthesize_papers(lit_result['papers'], progress_callback)
+        # Steps 2+3: Synthesis + Extensions in one call
+        fused = await self.synthesize_and_extend(lit_result['papers'], progress_callback, stream_callback)
         
-        # Step 3: Extensions (ExtensionsAgent)
-        ext_result = await self.generate_extensions(syn_result, progress_callback)
+        if fused is not None:
+            synthesis, extensions = fused['synthesis'], fused['extensions']
+        else:
+            # Fused reply could not be split - run the steps separately.
+            # Extensions are drawn from the papers rather than the synthesis
+            # so the two agents can run side by side
+            syn_result, ext_result = await asyncio.gather(
+                self.synthesize_papers(lit_result['papers'], progress_callback),
+                self.generate_extensions(
+                    lit_result['papers'],
+                    progress_callback,
+                    stream_callback=(lambda text: stream_callback("extensions", text)) if stream_callback else None
+                )
+            )
+            synthesis, extensions = syn_result['synthesis'], ext_result['extensions']
         
         if progress_callback:
             progress_callback("Workflow completed", 100)
         
-        print("\n✅ [RoundRobin] Full workflow completed!\n")
+        logger.info("[Workflow] Full workflow completed: %s", topic)
         
         return {
             "topic": topic,
             "literature": lit_result['formatted'],
-            "synthesis": syn_result['synthesis'],
-            "extensions": ext_result['extensions'],
+            "synthesis": synthesis,
+            "extensions": extensions,
             "status": "completed"
         }
     
+    async def synthesize_and_extend(
+        self,
+        papers: List[Dict],
+        progress_callback: Optional[Callable] = None,
+        stream_callback: Optional[Callable[[str, str], None]] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Synthesize papers AND generate extensions in a single agent call
+        
+        Args:
+            papers: List of papers
+            progress_callback: Optional progress callback
+            stream_callback: Optional callback receiving (stage, text so far)
+            
+        Returns:
+            {"synthesis": ..., "extensions": ...}, or None if the call failed
+            or the reply had no delimiter (run the separate steps instead)
+        """
+        logger.info("[ResearchAgent] Synthesizing %d papers + extensions", len(papers))
+        
+        if progress_callback:
+            progress_callback("Synthesizing papers and generating extensions", 60)
+        
+        on_delta = None
+        if stream_callback:
+            def on_delta(text: str):
+                if not text:
+                    # Reply restarted (retry/fallback): clear both stages
+                    stream_callback("synthesis", "")
+                    stream_callback("extensions", "")
+                elif EXTENSIONS_DELIMITER in text:
+                    stream_callback("extensions", text.split(EXTENSIONS_DELIMITER, 1)[1].lstrip())
+                else:
+                    stream_callback("synthesis", text)
+        
+        papers_text = "\n\n".join(
+            f"Paper {i}: {p['title']}\nAbstract: {truncate_tokens(p.get('abstract') or 'N/A', self.SYNTHESIS_ABSTRACT_TOKENS)}"
+            for i, p in enumerate(papers, 1)
+        )
+        
+        message = f"""Task 1: Summarize the research papers below.
+Task 2: Based on your summaries, generate 3 innovative future research directions.
+
+{papers_text}"""
+        
+        try:
+            reply = await self._ask("research", message, on_delta=on_delta)
+        except Exception as e:
+            logger.warning("[ResearchAgent] Fused call failed, using separate steps: %s", e)
+            return None
+        
+        if EXTENSIONS_DELIMITER not in reply:
+            logger.warning("[ResearchAgent] No section delimiter in reply, using separate steps")
+            return None
+        
+        synthesis, extensions = reply.split(EXTENSIONS_DELIMITER, 1)
+        
+        if progress_callback:
+            progress_callback("Extensions generated", 100)
+        
+        logger.debug("[ResearchAgent] Synthesis + extensions complete")
+        
+        return {"synthesis": synthesis.strip(), "extensions": extensions.strip()}
+    
+    async def run_batch_workflow(
+        self,
+        topics: List[str],
+        max_papers: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the full workflow for many topics through the Azure OpenAI Batch API
+        For bulk background jobs: cheaper and on separate rate limits than
+        realtime calls, but each batch can take up to 24h to finish
+        
+        Args:
+            topics: Research topics
+            max_papers: Max papers per topic
+            
+        Returns:
+            One workflow result per topic (same shape as run_full_workflow)
+        """
+        logger.info("[Batch] Starting batch workflow for %d topics", len(topics))
+        
+        # Step 1: Literature for every topic (PubMed only, no LLM); the
+        # esearch lookups run concurrently and share a single efetch
+        papers_by_topic = await asearch_pubmed_many(topics, max_papers)
+        all_papers = [papers_by_topic.get(topic, []) for topic in topics]
+        
+        # Step 2: Synthesis (one request per paper)
+        first_stage = {}
+        for t, papers in enumerate(all_papers):
+            if not papers:
+                continue
+            for i, paper in enumerate(papers, 1):
+                first_stage[f"synthesis-{t}-{i}"] = ("synthesis", self._synthesis_message(i, paper))
+        
+        first_replies = await self._run_batch(first_stage)
+        
+        syntheses = {}
+        for t, papers in enumerate(all_papers):
+            if papers:
+                syntheses[t] = "\n\n".join(
+                    first_replies.get(f"synthesis-{t}-{i}", "")
+                    for i in range(1, len(papers) + 1)
+                )
+        
+        # Step 3: Extensions from each synthesis
+        ext_replies = await self._run_batch({
+            f"extensions-{t}": ("extensions", self._extensions_message(synthesis))
+            for t, synthesis in syntheses.items()
+        })
+        
+        results = []
+        for t, (topic, papers) in enumerate(zip(topics, all_papers)):
+            if not papers:
+                results.append({
+                    "topic": topic,
+                    "literature": "No papers found",
+                    "synthesis": "Cannot synthesize - no papers",
+                    "extensions": "Cannot generate extensions - no papers",
+                    "status": "completed_with_no_results"
+                })
+                continue
+            
+            results.append({
+                "topic": topic,
+                "literature": self._format_papers(papers),
+                "synthesis": syntheses[t],
+                "extensions": ext_replies.get(f"extensions-{t}", ""),
+                "status": "completed"
+            })
+        
+        logger.info("[Batch] Batch workflow completed")
+        
+        return results
+    
     def _format_papers(self, papers: List[Dict]) -> str:
         """Format papers for display (fallback)"""
-        result = []
+        buf = io.StringIO()
+        write = buf.write
         for i, paper in enumerate(papers, 1):
-            result.append(f"""
+            authors = paper.get('authors_short') or ', '.join((paper.get('authors') or [])[:3])
+            if i > 1:
+                write("\n")
+            write(f"""
 **Paper {i}: {paper['title']}**
-- Authors: {', '.join(paper['authors'][:3])}
+- Authors: {authors}
 - Journal: {paper['journal']}
 - Date: {paper['pubdate']}
 - Link: {paper['link']}
 - DOI: {paper['doi']}
 """)
         
-        return "\n".join(result)
+        return buf.getvalue()
     
-    def _format_papers_for_agent(self, papers: List[Dict]) -> str:
+    def _format_papers_for_agent(self, papers: List[Dict], include_links: bool = True) -> str:
         """Format papers for agent processing"""
-        result = []
+        buf = io.StringIO()
+        write = buf.write
         for i, paper in enumerate(papers, 1):
-            result.append(f"""Paper {i}:
+            authors = paper.get('authors_short') or ', '.join((paper.get('authors') or [])[:3])
+            abstract = truncate_tokens(paper.get('abstract') or 'N/A', self.AGENT_ABSTRACT_TOKENS)
+            if i > 1:
+                write("\n\n")
+            write(f"""Paper {i}:
 Title: {paper['title']}
-Authors: {', '.join(paper['authors'][:3])}
+Authors: {authors}
 Journal: {paper['journal']}
 Date: {paper['pubdate']}
-Link: {paper['link']}
+""")
+            if include_links:
+                write(f"""Link: {paper['link']}
 DOI: {paper['doi']}
-Abstract: {paper.get('abstract', 'N/A')[:200]}
 """)
-        return "\n\n".join(result)
+            write(f"""Abstract: {abstract}
+""")
+        
+        return buf.getvalue()
+    
+    def _synthesis_message(self, index: int, paper: Dict) -> str:
+        """Build the SynthesisAgent task for one paper"""
+        abstract = truncate_tokens(paper.get('abstract') or 'N/A', self.SYNTHESIS_ABSTRACT_TOKENS)
+        return f"""Summarize this research paper:
+
+Paper {index}: {paper['title']}
+Abstract: {abstract}"""
+    
+    def _extensions_message(self, context: str) -> str:
+        """Build the ExtensionsAgent task from a synthesis"""
+        return f"""Generate 3 innovative future research directions based on this research:
+
+{context[:1000]}"""
+    
+    def _explain_message(self, concept: str, context: Optional[str] = None) -> str:
+        """Build the ExplainerAgent task for a concept"""
+        message = f"""Explain this concept in simple terms.
+
+Concept: {concept}"""
+        
+        if context:
+            message += f"\n\nContext: {context[:200]}"
+        
+        return message
+    
+    async def _run_batch(self, requests: Dict[str, tuple]) -> Dict[str, str]:
+        """
+        Run agent calls through the Azure OpenAI Batch API
+        
+        Args:
+            requests: custom_id -> (agent, user message)
+            
+        Returns:
+            custom_id -> reply text (an error string for failed requests)
+        """
+        if not requests:
+            return {}
+        
+        if self._batch_client is None:
+            self._batch_client = AsyncAzureOpenAI(
+                api_key=config.AZURE_OPENAI_API_KEY,
+                api_version=config.AZURE_OPENAI_API_VERSION,
+                azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
+                http_client=self._http
+            )
+        client = self._batch_client
+        
+        # One chat completion request per line
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {
+                    "model": config.AZURE_OPENAI_BATCH_DEPLOYMENT,
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPTS[agent]},
+                        {"role": "user", "content": message},
+                    ],
+                    "max_tokens": AGENT_MAX_TOKENS[agent],
+                },
+            })
+            for custom_id, (agent, message) in requests.items()
+        ]
+        
+        batch_file = await client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        await client.files.wait_for_processing(batch_file.id)
+        
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("[Batch] Submitted batch %s with %d requests", batch.id, len(lines))
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.BATCH_POLL_SECONDS)
+            batch = await client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+        
+        output = await client.files.content(batch.output_file_id)
+        
+        replies = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            body = (item.get("response") or {}).get("body") or {}
+            choices = body.get("choices") or []
+            if choices:
+                replies[item["custom_id"]] = choices[0]["message"]["content"]
+            else:
+                replies[item["custom_id"]] = f"Error: {item.get('error') or body.get('error')}"
+        
+        return replies
+    
+    async def _cached(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh cached result for key, or await coro_factory() and cache it"""
+        result = self._cache.get(key)
+        if result is None:
+            result = await self._coalesce(key, coro_factory)
+            self._cache.set(key, result)
+        return result
+    
+    async def _coalesce(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Share one in-flight run of coro_factory() between concurrent calls
+        with the same key; the entry is dropped as soon as the run finishes
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield so one cancelled caller does not cancel the shared run
+        return await asyncio.shield(task)
+    
+    async def _ask(
+        self,
+        agent: str,
+        message: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Send one system + user turn for an agent and return the reply text
+        
+        If on_delta is given the reply is streamed and on_delta is called
+        with the accumulated text after every chunk (and with "" when a
+        retry restarts the reply).
+        
+        Replies are cached per (deployment, agent prompt, message) and
+        identical concurrent non-streaming calls share one upstream request.
+        """
+        key = self._prompt_key(agent, message)
+        
+        if on_delta is None:
+            return await self._cached(key, lambda: self._ask_uncached(agent, message))
+        
+        # A streamed reply can't be shared mid-flight, but a cached one can
+        # still be replayed to the caller in a single delta
+        reply = self._cache.get(key)
+        if reply is None:
+            reply = await self._ask_uncached(agent, message, on_delta)
+            self._cache.set(key, reply)
+        else:
+            on_delta(reply)
+        return reply
     
-    def _extract_agent_response(self, result) -> str:
-        """Extract text response from agent result"""
+    def _prompt_key(self, agent: str, message: str) -> tuple:
+        """Cache key for one agent turn"""
+        digest = hashlib.blake2b(
+            json.dumps([SYSTEM_PROMPTS[agent], message]).encode()
+        ).hexdigest()
+        return ("llm", config.AZURE_OPENAI_DEPLOYMENT, digest)
+    
+    async def _ask_uncached(
+        self,
+        agent: str,
+        message: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Send one agent turn to Azure, retrying and falling back as needed"""
+        messages = [
+            self._system_messages[agent],
+            UserMessage(content=message, source="user"),
+        ]
+        
+        extra_args = {"max_tokens": AGENT_MAX_TOKENS[agent]}
+        
+        if on_delta is None:
+            call = lambda client: client.create(messages, extra_create_args=extra_args)
+        else:
+            streamed = False
+            
+            def report(text: str):
+                nonlocal streamed
+                streamed = True
+                on_delta(text)
+            
+            def call(client):
+                # A retry or the fallback starts the reply over, so first
+                # clear the partial text the failed attempt reported
+                nonlocal streamed
+                if streamed:
+                    streamed = False
+                    on_delta("")
+                return self._stream(client, messages, report, extra_args)
+        
         try:
-            # Get last message from agent
-            if hasattr(result, 'messages') and result.messages:
-                last_message = result.messages[-1]
-                if hasattr(last_message, 'content'):
-                    return last_message.content
-            
-            # Fallback
-            return str(result)
-        except Exception as e:
-            print(f"⚠️ Error extracting response: {e}")
-            return str(result)
+            response = await self._call_with_retry(call, self.model_client)
+        except RETRYABLE_ERRORS:
+            if self._fallback_client is None:
+                raise
+            self.fallback_count += 1
+            logger.warning("Primary deployment unavailable, using fallback (fallbacks so far: %d)", self.fallback_count)
+            async with self._sem:
+                response = await call(self._fallback_client)
+        
+        return response.content
+    
+    async def _stream(
+        self,
+        client: AzureOpenAIChatCompletionClient,
+        messages: List[Any],
+        on_delta: Callable[[str], None],
+        extra_args: Dict[str, Any]
+    ) -> Any:
+        """Stream a completion, reporting partial text; returns the final CreateResult"""
+        text = ""
+        result = None
+        async for chunk in client.create_stream(messages, extra_create_args=extra_args):
+            if isinstance(chunk, str):
+                text += chunk
+                on_delta(text)
+            else:
+                result = chunk
+        return result
+    
+    async def _call_with_retry(self, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Await fn(*args), retrying transient errors with exponential backoff + jitter
+        Each attempt holds the concurrency semaphore; backoff sleeps do not
+        """
+        for attempt in range(self.MAX_LLM_ATTEMPTS):
+            try:
+                async with self._sem:
+                    return await fn(*args)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_LLM_ATTEMPTS - 1:
+                    raise
+                delay = 2 ** attempt + random.random()
+                logger.warning("LLM call failed (%s), retrying in %.1fs", type(e).__name__, delay)
+                await asyncio.sleep(delay)
 
 
 # Global instance
 _orchestrator = None
+_orchestrator_lock = threading.Lock()
 
 
 def get_orchestrator() -> ResearchOrchestrator:
-    """Get or create orchestrator instance"""
+    """Get or create orchestrator instance (thread-safe)"""
     global _orchestrator
     if _orchestrator is None:
-        _orchestrator = ResearchOrchestrator()
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = ResearchOrchestrator()
     return _orchestrator
@@ -5,21 +5,99 @@ Simplified FastAPI Backend - FIXED VERSION
 - Progress tracking
 - All features work standalone
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only
+from typing import AsyncIterator, Optional, List, Dict
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 import uuid
 from datetime import datetime
 import asyncio
-
+import hashlib
+import logging
+import multiprocessing
+import queue
+import orjson
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cache_utils import TTLCache
 from config import config
-from database import init_db, get_db, PaperSubmission
+from database import init_db, get_db, engine, PaperSubmission
 from orchestrator import get_orchestrator
 from pdf_utils import extract_text_from_pdf, extract_pdf_metadata
 
+logger = logging.getLogger(__name__)
+
+
+def start_logging() -> QueueListener:
+    """
+    Route all log records through a queue; a background thread does the
+    actual (blocking) writes so logging never stalls the event loop
+    """
+    log_queue = queue.Queue(-1)
+    
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(config.LOG_LEVEL)
+    
+    listener = QueueListener(log_queue, console, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize everything before the first request, clean up on shutdown"""
+    log_listener = start_logging()
+    config.validate()
+    init_db()
+    
+    # Bound the threads used for PDF metadata and DB writes
+    executor = ThreadPoolExecutor(max_workers=config.BLOCKING_IO_WORKERS)
+    asyncio.get_running_loop().set_default_executor(executor)
+    
+    # Text extraction is CPU-bound Python, so give it processes (no shared GIL)
+    app.state.pdf_pool = ProcessPoolExecutor(
+        max_workers=config.PDF_PARSE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    
+    # Build the orchestrator now rather than on the first API call
+    app.state.orch = get_orchestrator()
+    
+    # Handshake with PubMed and Azure in the background; startup doesn't wait
+    warmup = None
+    if config.WARMUP_CONNECTIONS:
+        warmup = asyncio.create_task(app.state.orch.warmup())
+    logger.info("Backend initialized - all features work independently")
+    
+    yield
+    
+    if warmup is not None:
+        warmup.cancel()
+    await app.state.orch.aclose()
+    engine.dispose()
+    app.state.pdf_pool.shutdown(wait=False, cancel_futures=True)
+    executor.shutdown(wait=False)
+    log_listener.stop()
+
+
 # Initialize FastAPI
-app = FastAPI(title="Simple Research Assistant - Fixed", version="2.0.0")
+app = FastAPI(
+    title="Simple Research Assistant - Fixed",
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 # CORS
 app.add_middleware(
@@ -30,30 +108,203 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Progress tracking
-workflow_progress = {}
+# Server-sent event streams must reach the client unbuffered
+SSE_PATH_PREFIX = "/api/research/stream/"
 
-# Initialize database on startup
-@app.on_event("startup")
-async def startup():
-    config.validate()
-    init_db()
-    print("✅ Backend initialized - All features work independently!")
+
+class SSEAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves event streams alone"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(SSE_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress large JSON (completed workflow results, paper feedback)
+app.add_middleware(SSEAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Multipart PDF endpoints; Starlette parses (and spools) their whole body
+# before the handler runs, so the size cap has to be applied up front
+MULTIPART_PDF_PATHS = ("/api/check-paper-pdf", "/api/submit-paper-pdf")
+
+# Room for the multipart boundaries and text fields around the PDF
+MULTIPART_OVERHEAD_BYTES = 64 << 10
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart PDF uploads over MAX_UPLOAD_MB by Content-Length,
+    before any of the body is read (the raw endpoints enforce the cap
+    while streaming, see spool_pdf)
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in MULTIPART_PDF_PATHS:
+            headers = dict(scope["headers"])
+            length = headers.get(b"content-length", b"")
+            error = None
+            if not length.isdigit():
+                error = (411, "Content-Length is required for PDF uploads")
+            elif int(length) > (config.MAX_UPLOAD_MB << 20) + MULTIPART_OVERHEAD_BYTES:
+                error = (413, f"PDF exceeds the {config.MAX_UPLOAD_MB} MB upload limit")
+            
+            if error is not None:
+                response = ORJSONResponse({"detail": error[1]}, status_code=error[0])
+                await response(scope, receive, send)
+                return
+        
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Progress tracking (bounded; finished workflows expire after the TTL)
+workflow_progress = TTLCache(
+    max_entries=config.WORKFLOW_MAX_ENTRIES,
+    ttl=config.WORKFLOW_TTL_SECONDS
+)
+
+# Queues of clients streaming each workflow's progress
+progress_subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+# Seconds between keep-alive comments on an idle progress stream
+SSE_KEEPALIVE_SECONDS = 15
+
+# Extracted text and feedback for recently uploaded PDFs, keyed by content hash
+pdf_cache = TTLCache(max_entries=config.CACHE_MAX_ENTRIES, ttl=config.CACHE_TTL_SECONDS)
+
+# Uploads are read in chunks of this size; bigger files spill to disk
+UPLOAD_CHUNK_BYTES = 1 << 20
+UPLOAD_SPOOL_BYTES = 8 << 20
+
+# Body types accepted by the raw (non-multipart) PDF endpoints
+RAW_PDF_CONTENT_TYPES = ("application/pdf", "application/octet-stream")
+
+# Leading slice of a paper that is checked and stored
+CONTENT_PREVIEW_CHARS = 5000
+
+# ==================== Helpers ====================
+
+async def read_pdf_upload(pdf_file: UploadFile):
+    """
+    Copy a multipart upload into our own spool and hash it (see spool_pdf)
+    Starlette has already buffered the body by now; its size was capped
+    by UploadSizeLimitMiddleware
+    """
+    async def chunks():
+        while chunk := await pdf_file.read(UPLOAD_CHUNK_BYTES):
+            yield chunk
+    
+    return await spool_pdf(chunks())
+
+
+async def read_pdf_body(request: Request):
+    """Spool a raw application/pdf request body (see spool_pdf)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in RAW_PDF_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Expected an application/pdf body")
+    
+    return await spool_pdf(request.stream())
+
+
+async def spool_pdf(chunks: AsyncIterator[bytes]):
+    """
+    Stream PDF bytes into a spooled temp file, hashing them as they arrive
+    For raw bodies this bounds memory: nothing past MAX_UPLOAD_MB is read
+    
+    Returns:
+        (file-like object, blake2b hex digest)
+        
+    Raises:
+        HTTPException(413) as soon as the upload exceeds MAX_UPLOAD_MB
+    """
+    max_bytes = config.MAX_UPLOAD_MB << 20
+    hasher = hashlib.blake2b()
+    buf = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    total = 0
+    
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            buf.close()
+            raise HTTPException(
+                status_code=413,
+                detail=f"PDF exceeds the {config.MAX_UPLOAD_MB} MB upload limit"
+            )
+        hasher.update(chunk)
+        buf.write(chunk)
+    
+    buf.seek(0)
+    return buf, hasher.hexdigest()
+
+
+def update_workflow(workflow_id: str, **fields):
+    """Merge fields into a workflow's progress, refreshing its TTL"""
+    progress = workflow_progress.get(workflow_id) or {}
+    progress.update(fields)
+    workflow_progress.set(workflow_id, progress)
+    
+    # Push a snapshot to anyone streaming this workflow
+    for queue in progress_subscribers.get(workflow_id, ()):
+        queue.put_nowait(dict(progress))
+
+
+def sse_event(data: dict) -> bytes:
+    """Encode one server-sent event"""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+async def extract_pdf_text(pdf_buf, digest: str) -> str:
+    """
+    Extract the leading text of an uploaded PDF (enough for the preview),
+    reusing the result for repeat uploads
+    """
+    content = pdf_cache.get(("text", digest))
+    if content is None:
+        # Parse in the process pool; the worker needs picklable bytes, so
+        # the whole PDF (at most MAX_UPLOAD_MB) is held in memory here
+        pdf_buf.seek(0)
+        pdf_bytes = pdf_buf.read()
+        content = await asyncio.get_running_loop().run_in_executor(
+            app.state.pdf_pool, extract_text_from_pdf, pdf_bytes, CONTENT_PREVIEW_CHARS
+        )
+        
+        if not content.strip():
+            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+        
+        pdf_cache.set(("text", digest), content)
+    
+    return content
 
 
 # ==================== Request/Response Models ====================
 
+# Request bodies are read-only, reject unknown fields and come in trimmed
+REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
+
 class ResearchRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     topic: str
     max_papers: int = 5
 
 
 class ConceptRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     concept: str
     context: Optional[str] = None
 
 
 class PaperCheckRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     title: str
     content: str
 
@@ -105,12 +356,13 @@ async def run_full_research(request: ResearchRequest):
     workflow_id = str(uuid.uuid4())
     
     # Initialize progress
-    workflow_progress[workflow_id] = {
-        "status": "starting",
-        "step": "Initializing workflow",
-        "progress": 0,
-        "results": {}
-    }
+    update_workflow(
+        workflow_id,
+        status="starting",
+        step="Initializing workflow",
+        progress=0,
+        results={}
+    )
     
     # Start workflow in background
     asyncio.create_task(run_research_background(workflow_id, request))
@@ -118,7 +370,8 @@ async def run_full_research(request: ResearchRequest):
     return {
         "workflow_id": workflow_id,
         "message": "Research workflow started",
-        "check_progress_at": f"/api/research/progress/{workflow_id}"
+        "check_progress_at": f"/api/research/progress/{workflow_id}",
+        "stream_progress_at": f"{SSE_PATH_PREFIX}{workflow_id}"
     }
 
 
@@ -128,11 +381,7 @@ async def run_research_background(workflow_id: str, request: ResearchRequest):
         orch = get_orchestrator()
         
         def update_progress(step, progress):
-            workflow_progress[workflow_id].update({
-                "status": "running",
-                "step": step,
-                "progress": progress
-            })
+            update_workflow(workflow_id, status="running", step=step, progress=progress)
         
         # Run full workflow
         results = await orch.run_full_workflow(
@@ -142,29 +391,72 @@ async def run_research_background(workflow_id: str, request: ResearchRequest):
         )
         
         # Complete
-        workflow_progress[workflow_id].update({
-            "status": "completed",
-            "step": "Research completed",
-            "progress": 100,
-            "results": results
-        })
+        update_workflow(
+            workflow_id,
+            status="completed",
+            step="Research completed",
+            progress=100,
+            results=results
+        )
         
     except Exception as e:
-        workflow_progress[workflow_id].update({
-            "status": "failed",
-            "step": f"Error: {str(e)}",
-            "progress": 0,
-            "error": str(e)
-        })
+        update_workflow(
+            workflow_id,
+            status="failed",
+            step=f"Error: {str(e)}",
+            progress=0,
+            error=str(e)
+        )
 
 
 @app.get("/api/research/progress/{workflow_id}")
 async def get_research_progress(workflow_id: str):
     """Get research workflow progress"""
-    if workflow_id not in workflow_progress:
+    progress = workflow_progress.get(workflow_id)
+    if progress is None:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    return workflow_progress[workflow_id]
+    return progress
+
+
+@app.get(SSE_PATH_PREFIX + "{workflow_id}")
+async def stream_research_progress(workflow_id: str):
+    """
+    Stream research workflow progress as server-sent events
+    Sends the current state, then every update until the workflow ends
+    """
+    progress = workflow_progress.get(workflow_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    queue = asyncio.Queue()
+    progress_subscribers.setdefault(workflow_id, []).append(queue)
+    queue.put_nowait(dict(progress))
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    update = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                
+                yield sse_event(update)
+                if update.get("status") in ("completed", "failed"):
+                    break
+        finally:
+            subscribers = progress_subscribers.get(workflow_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                progress_subscribers.pop(workflow_id, None)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # ==================== CONCEPT EXPLANATION (Independent) ====================
@@ -222,29 +514,8 @@ async def check_paper_pdf(
     Works standalone!
     """
     try:
-        # Read PDF
-        pdf_bytes = await pdf_file.read()
-        
-        # Extract text
-        content = extract_text_from_pdf(pdf_bytes)
-        
-        if not content.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
-        
-        # Extract metadata if title not provided
-        if not title:
-            metadata = extract_pdf_metadata(pdf_bytes)
-            title = metadata.get("title", pdf_file.filename)
-        
-        # Check formatting
-        orch = get_orchestrator()
-        feedback = await orch.check_paper(title=title, content=content)
-        
-        return {
-            **feedback,
-            "pdf_filename": pdf_file.filename,
-            "standalone": True
-        }
+        pdf_buf, digest = await read_pdf_upload(pdf_file)
+        return await _check_pdf(pdf_buf, digest, title, pdf_file.filename)
     
     except HTTPException:
         raise
@@ -252,6 +523,57 @@ async def check_paper_pdf(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/check-paper-pdf/raw")
+async def check_paper_pdf_raw(
+    request: Request,
+    title: Optional[str] = Query(None),
+    filename: Optional[str] = Query(None)
+):
+    """
+    Check paper formatting from a raw application/pdf body
+    Same as /api/check-paper-pdf without the multipart parsing
+    """
+    try:
+        pdf_buf, digest = await read_pdf_body(request)
+        return await _check_pdf(pdf_buf, digest, title, filename)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _check_pdf(pdf_buf, digest: str, title: Optional[str], filename: Optional[str]) -> dict:
+    """Run (or reuse) the formatting check for a spooled PDF"""
+    with pdf_buf:
+        # Same PDF and title as a recent upload: reuse its feedback
+        feedback = pdf_cache.get(("feedback", digest, title))
+        
+        if feedback is None:
+            content = await extract_pdf_text(pdf_buf, digest)
+            
+            # Extract metadata if title not provided
+            check_title = title
+            if not check_title:
+                metadata = await asyncio.to_thread(extract_pdf_metadata, pdf_buf)
+                check_title = metadata.get("title", filename)
+            
+            # Check formatting
+            orch = get_orchestrator()
+            feedback = await orch.check_paper(
+                title=check_title,
+                content=content[:CONTENT_PREVIEW_CHARS]
+            )
+            if "error" not in feedback:
+                pdf_cache.set(("feedback", digest, title), feedback)
+    
+    return {
+        **feedback,
+        "pdf_filename": filename,
+        "standalone": True
+    }
+
+
 # ==================== PAPER SUBMISSION (Independent) ====================
 
 @app.post("/api/submit-paper-pdf")
@@ -259,58 +581,38 @@ async def submit_paper_pdf(
     pdf_file: UploadFile = File(...),
     title: str = Form(...),
     authors: str = Form(...),
-    professor_email: str = Form(...)
+    professor_email: str = Form(...),
+    db: Session = Depends(get_db)
 ):
     """
     Submit paper from PDF - INDEPENDENT
     Works standalone!
     """
     try:
-        # Read PDF
-        pdf_bytes = await pdf_file.read()
-        
-        # Extract text
-        content = extract_text_from_pdf(pdf_bytes)
-        
-        if not content.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
-        
-        # Parse authors
-        authors_list = [a.strip() for a in authors.split(",")]
-        
-        # Generate submission ID
-        submission_id = f"SUB-{uuid.uuid4().hex[:8].upper()}"
-        
-        # Check formatting (optional, quick)
-        try:
-            orch = get_orchestrator()
-            feedback = await orch.check_paper(title=title, content=content)
-            feedback_text = feedback.get('feedback', '')
-        except:
-            feedback_text = "Formatting check skipped"
-        
-        # Store in database
-        db = next(get_db())
-        submission = PaperSubmission(
-            submission_id=submission_id,
-            title=title,
-            authors=", ".join(authors_list),
-            content=content[:5000],  # Store preview only
-            professor_email=professor_email,
-            status="submitted",
-            feedback=feedback_text
-        )
-        db.add(submission)
-        db.commit()
-        
-        return {
-            "submission_id": submission_id,
-            "status": "submitted",
-            "message": f"Paper submitted to {professor_email}",
-            "submitted_at": datetime.now().isoformat(),
-            "formatting_feedback": feedback_text,
-            "standalone": True
-        }
+        pdf_buf, digest = await read_pdf_upload(pdf_file)
+        return await _submit_pdf(pdf_buf, digest, title, authors, professor_email, db)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/submit-paper-pdf/raw")
+async def submit_paper_pdf_raw(
+    request: Request,
+    title: str = Query(...),
+    authors: str = Query(...),
+    professor_email: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit paper from a raw application/pdf body
+    Same as /api/submit-paper-pdf without the multipart parsing
+    """
+    try:
+        pdf_buf, digest = await read_pdf_body(request)
+        return await _submit_pdf(pdf_buf, digest, title, authors, professor_email, db)
     
     except HTTPException:
         raise
@@ -318,19 +620,94 @@ async def submit_paper_pdf(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _submit_pdf(
+    pdf_buf,
+    digest: str,
+    title: str,
+    authors: str,
+    professor_email: str,
+    db: Session
+) -> dict:
+    """Extract, check and store a spooled PDF submission"""
+    with pdf_buf:
+        content = await extract_pdf_text(pdf_buf, digest)
+    
+    # Slice once; the check and the stored row use the same preview
+    preview = content[:CONTENT_PREVIEW_CHARS]
+    del content
+    
+    # Parse authors
+    authors_list = [a.strip() for a in authors.split(",")]
+    
+    # Generate submission ID
+    submission_id = f"SUB-{uuid.uuid4().hex[:8].upper()}"
+    
+    # Check formatting (optional, quick)
+    feedback = pdf_cache.get(("feedback", digest, title))
+    try:
+        if feedback is None:
+            orch = get_orchestrator()
+            feedback = await orch.check_paper(title=title, content=preview)
+            if "error" not in feedback:
+                pdf_cache.set(("feedback", digest, title), feedback)
+        feedback_text = feedback.get('feedback', '')
+    except:
+        feedback_text = "Formatting check skipped"
+    
+    # Store in database
+    submission = PaperSubmission(
+        submission_id=submission_id,
+        title=title,
+        authors=", ".join(authors_list),
+        content=preview,  # Store preview only
+        professor_email=professor_email,
+        status="submitted",
+        feedback=feedback_text
+    )
+    await asyncio.to_thread(_save_submission, db, submission)
+    
+    return {
+        "submission_id": submission_id,
+        "status": "submitted",
+        "message": f"Paper submitted to {professor_email}",
+        "submitted_at": datetime.now().isoformat(),
+        "formatting_feedback": feedback_text,
+        "standalone": True
+    }
+
+
+def _save_submission(db: Session, submission: PaperSubmission):
+    """Insert and commit a submission (blocking; run in a worker thread)"""
+    db.add(submission)
+    db.commit()
+
+
 # ==================== SUBMISSION STATUS (Independent) ====================
 
+# Columns returned by the status endpoint (skips the large content column)
+SUBMISSION_STATUS_COLUMNS = (
+    PaperSubmission.submission_id,
+    PaperSubmission.title,
+    PaperSubmission.status,
+    PaperSubmission.submitted_at,
+    PaperSubmission.feedback,
+)
+
+
 @app.get("/api/submission/{submission_id}")
-async def get_submission_status(submission_id: str):
+async def get_submission_status(submission_id: str, db: Session = Depends(get_db)):
     """
     Check submission status - INDEPENDENT
     Works anytime!
     """
     try:
-        db = next(get_db())
-        submission = db.query(PaperSubmission).filter(
-            PaperSubmission.submission_id == submission_id
-        ).first()
+        submission = await asyncio.to_thread(
+            lambda: db.scalars(
+                select(PaperSubmission)
+                .options(load_only(*SUBMISSION_STATUS_COLUMNS))
+                .where(PaperSubmission.submission_id == submission_id)
+            ).first()
+        )
         
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
@@ -351,4 +728,11 @@ async def get_submission_status(submission_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=config.BACKEND_PORT)
+    uvicorn.run(
+        "backend:app",
+        host="0.0.0.0",
+        port=config.BACKEND_PORT,
+        loop="uvloop",
+        http="httptools",
+        workers=config.BACKEND_WORKERS
+    )
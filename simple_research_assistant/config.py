@@ -1,5 +1,5 @@
 """
-Simplified Configuration - Only GPT-4o, No Fallbacks
+Simplified Configuration - GPT-4o with an optional fallback deployment
 """
 import os
 from dotenv import load_dotenv
@@ -8,24 +8,74 @@ load_dotenv()
 
 
 class Config:
-    """Simple configuration for Azure OpenAI GPT-4o only"""
+    """Simple configuration for Azure OpenAI GPT-4o"""
     
-    # Azure OpenAI - Only one model, no fallbacks
+    # Azure OpenAI - One primary model
     AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
     AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
     
+    # Optional fallback deployment used when the primary keeps returning 429s
+    # (endpoint and key default to the primary ones)
+    AZURE_OPENAI_FALLBACK_DEPLOYMENT = os.getenv("AZURE_OPENAI_FALLBACK_DEPLOYMENT")
+    AZURE_OPENAI_FALLBACK_ENDPOINT = os.getenv("AZURE_OPENAI_FALLBACK_ENDPOINT", AZURE_OPENAI_ENDPOINT)
+    AZURE_OPENAI_FALLBACK_API_KEY = os.getenv("AZURE_OPENAI_FALLBACK_API_KEY", AZURE_OPENAI_API_KEY)
+    
+    # Deployment used for Batch API jobs (must be a batch-enabled deployment)
+    AZURE_OPENAI_BATCH_DEPLOYMENT = os.getenv("AZURE_OPENAI_BATCH_DEPLOYMENT", AZURE_OPENAI_DEPLOYMENT)
+    
+    # Max concurrent LLM calls per client (size to the deployment's RPM / 60)
+    AZURE_MAX_CONCURRENCY = int(os.getenv("AZURE_MAX_CONCURRENCY", "10"))
+    
+    # Open PubMed/Azure connections at startup so the first request skips the handshakes
+    WARMUP_CONNECTIONS = os.getenv("WARMUP_CONNECTIONS", "true").lower() == "true"
+    
     # Server
     BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8000"))
     FRONTEND_PORT = int(os.getenv("FRONTEND_PORT", "8501"))
     
+    # Uvicorn worker processes. Keep at 1 unless workflow progress moves to a
+    # shared store: progress and caches live in each worker's memory
+    BACKEND_WORKERS = int(os.getenv("BACKEND_WORKERS", "1"))
+    
+    # Backend log level (DEBUG, INFO, WARNING, ...)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    
+    # Threads for blocking work (PDF metadata, DB writes) in the backend
+    BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "8"))
+    
+    # Processes for PDF text extraction
+    PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    # Largest accepted PDF upload
+    MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "20"))
+    
     # PubMed
     PUBMED_EMAIL = os.getenv("PUBMED_EMAIL", "researcher@example.com")
+    PUBMED_BASE_URL = os.getenv("PUBMED_BASE_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/")
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./research.db")
     
+    # In-process result cache
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+    
+    # On-disk cache for LLM replies (DISK_CACHE_TTL_SECONDS also applies to
+    # cached PubMed records)
+    DISK_CACHE_DIR = os.path.expanduser(os.getenv("DISK_CACHE_DIR", "~/.research_assistant/cache"))
+    DISK_CACHE_TTL_SECONDS = int(os.getenv("DISK_CACHE_TTL_SECONDS", "86400"))
+    DISK_CACHE_SIZE_MB = int(os.getenv("DISK_CACHE_SIZE_MB", "1024"))
+    
+    # On-disk cache for PubMed searches and records (separate directory)
+    PUBMED_CACHE_DIR = os.path.expanduser(os.getenv("PUBMED_CACHE_DIR", "~/.research_assistant/pubmed"))
+    PUBMED_CACHE_SIZE_MB = int(os.getenv("PUBMED_CACHE_SIZE_MB", "256"))
+    
+    # Research workflow progress kept by the backend
+    WORKFLOW_TTL_SECONDS = int(os.getenv("WORKFLOW_TTL_SECONDS", "3600"))
+    WORKFLOW_MAX_ENTRIES = int(os.getenv("WORKFLOW_MAX_ENTRIES", "10000"))
+    
     @classmethod
     def validate(cls):
         """Validate required settings"""
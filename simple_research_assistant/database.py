@@ -1,7 +1,7 @@
 """
 Simple Database Models
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Text, DateTime, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -27,7 +27,31 @@ class PaperSubmission(Base):
 
 
 # Database setup
-engine = create_engine(config.DATABASE_URL)
+_is_sqlite = config.DATABASE_URL.startswith("sqlite")
+
+if _is_sqlite:
+    # Sessions are handed between FastAPI's threadpool threads
+    engine = create_engine(
+        config.DATABASE_URL,
+        pool_pre_ping=True,
+        connect_args={"check_same_thread": False}
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a submission is being written"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+else:
+    engine = create_engine(
+        config.DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=40
+    )
+
 SessionLocal = sessionmaker(bind=engine)
 
 
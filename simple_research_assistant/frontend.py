@@ -4,12 +4,29 @@ Clean and user-friendly interface with PDF support and progress tracking
 """
 import streamlit as st
 import requests
+import gc
+import hashlib
+import orjson
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import config
 
 # API URL
 API_URL = f"http://localhost:{config.BACKEND_PORT}"
 
+# Same limit the backend enforces; checked before anything is sent
+MAX_UPLOAD_BYTES = config.MAX_UPLOAD_MB << 20
+
+# Request bodies are encoded with orjson, so the content type is set by hand
+JSON_HEADERS = {"Content-Type": "application/json"}
+PDF_HEADERS = {"Content-Type": "application/pdf"}
+
+# (connect, read) timeouts: fail fast on a dead backend, but give LLM-backed
+# calls time to answer; progress and status replies are tiny
+API_TIMEOUT = (5, 300)
+STATUS_TIMEOUT = (3, 10)
+
 # Page config
 st.set_page_config(
     page_title="Research Assistant",
@@ -24,28 +41,226 @@ if 'workflow_id' not in st.session_state:
     st.session_state.workflow_id = None
 
 
+@st.cache_resource
+def get_session() -> requests.Session:
+    """HTTP session shared across reruns so backend connections are reused"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=2,
+            connect=2,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504]
+        )
+    ))
+    return session
+
+
 def call_api(endpoint: str, data: dict):
     """Call backend API"""
     try:
-        response = requests.post(f"{API_URL}{endpoint}", json=data, timeout=300)
+        response = get_session().post(
+            f"{API_URL}{endpoint}", data=orjson.dumps(data), headers=JSON_HEADERS, timeout=API_TIMEOUT
+        )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except Exception as e:
         st.error(f"API Error: {str(e)}")
         return None
 
 
-def upload_pdf(endpoint: str, files: dict, data: dict = None):
+class _UncachedReply(Exception):
+    """Carries a reply out of _post_cached so st.cache_data doesn't keep it"""
+    
+    def __init__(self, reply: dict):
+        super().__init__("reply not cached")
+        self.reply = reply
+
+
+def _is_failed_reply(reply: dict) -> bool:
+    """
+    True for failures the backend answers with 200: an empty literature
+    search (PubMed errors come back as no papers), an explanation that
+    is the orchestrator's error text, or a paper check carrying "error"
+    """
+    return (
+        "error" in reply
+        or reply.get("count") == 0
+        or str(reply.get("explanation", "")).startswith("Error")
+    )
+
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=128, show_spinner=False)
+def _post_cached(endpoint: str, data: dict) -> dict:
+    """
+    POST whose successful replies are memoized; HTTP errors and failed
+    replies (see _is_failed_reply) raise, so aren't cached
+    """
+    response = get_session().post(
+        f"{API_URL}{endpoint}", data=orjson.dumps(data), headers=JSON_HEADERS, timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    reply = orjson.loads(response.content)
+    if _is_failed_reply(reply):
+        raise _UncachedReply(reply)
+    return reply
+
+
+def call_api_cached(endpoint: str, data: dict):
+    """Call a read-only backend API, reusing the reply for repeat requests"""
+    try:
+        return _post_cached(endpoint, data)
+    except _UncachedReply as e:
+        return e.reply
+    except Exception as e:
+        st.error(f"API Error: {str(e)}")
+        return None
+
+
+def _post_pdf(endpoint: str, uploaded_file, data: dict = None) -> dict:
+    """POST an uploaded PDF to the backend's raw endpoint (raises on failure)"""
+    # The PDF is the whole body and the fields ride in the query string,
+    # so neither side builds or parses multipart; requests streams the
+    # file object itself rather than a getvalue() copy
+    uploaded_file.seek(0)
+    params = {**(data or {}), "filename": uploaded_file.name}
+    response = get_session().post(
+        f"{API_URL}{endpoint}/raw",
+        data=uploaded_file,
+        params=params,
+        headers=PDF_HEADERS,
+        timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def _pdf_too_large(uploaded_file) -> bool:
+    """Report (and return True) if a PDF exceeds the upload limit"""
+    if uploaded_file.size > MAX_UPLOAD_BYTES:
+        st.error(f"PDF is larger than the {config.MAX_UPLOAD_MB} MB upload limit")
+        return True
+    return False
+
+
+def upload_pdf(endpoint: str, uploaded_file, data: dict = None):
     """Upload PDF to backend"""
+    if _pdf_too_large(uploaded_file):
+        return None
+    
     try:
-        response = requests.post(f"{API_URL}{endpoint}", files=files, data=data, timeout=300)
-        response.raise_for_status()
-        return response.json()
+        return _post_pdf(endpoint, uploaded_file, data)
     except Exception as e:
         st.error(f"Upload Error: {str(e)}")
         return None
 
 
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _check_pdf_cached(pdf_hash: str, title: str, _uploaded_file) -> dict:
+    """
+    Formatting check keyed on the PDF's hash (the file itself isn't hashed
+    by Streamlit); failed checks raise, so aren't cached
+    """
+    reply = _post_pdf("/api/check-paper-pdf", _uploaded_file, {"title": title} if title else {})
+    if _is_failed_reply(reply):
+        raise _UncachedReply(reply)
+    return reply
+
+
+def check_pdf(uploaded_file, title: str = ""):
+    """Check a PDF's formatting, reusing the result when the same file and title are checked again"""
+    if _pdf_too_large(uploaded_file):
+        return None
+    
+    with uploaded_file.getbuffer() as view:
+        pdf_hash = hashlib.blake2b(view, digest_size=16).hexdigest()
+    
+    try:
+        return _check_pdf_cached(pdf_hash, title, uploaded_file)
+    except _UncachedReply as e:
+        return e.reply
+    except Exception as e:
+        st.error(f"Upload Error: {str(e)}")
+        return None
+
+
+def poll_until(
+    url: str,
+    is_done,
+    interval_start: float = 0.25,
+    interval_max: float = 3.0,
+    growth: float = 1.5,
+    timeout: float = 600
+):
+    """
+    Poll a progress endpoint until is_done(response) is True
+    
+    The interval starts short, grows while progress is unchanged and
+    resets whenever it advances, so quick steps are seen quickly and
+    long ones aren't hammered.
+    
+    Returns:
+        The final response, or None if timeout elapsed first
+    """
+    interval = interval_start
+    last_progress = -1
+    deadline = time.monotonic() + timeout
+    
+    while time.monotonic() < deadline:
+        response = get_session().get(url, timeout=STATUS_TIMEOUT)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        if is_done(data):
+            return data
+        
+        progress = data.get("progress", 0)
+        if progress > last_progress:
+            last_progress = progress
+            interval = interval_start
+        else:
+            interval = min(interval * growth, interval_max)
+        
+        time.sleep(interval)
+    
+    return None
+
+
+def stream_until(url: str, is_done, timeout: float = 600):
+    """
+    Follow a server-sent progress stream until is_done(event) is True
+    
+    Returns:
+        The final event, or None if the stream is unavailable, breaks
+        (connection or read errors) or ends early (callers fall back to
+        polling)
+    """
+    deadline = time.monotonic() + timeout
+    
+    try:
+        # Read timeout must outlast the backend's keep-alive interval
+        with get_session().get(url, stream=True, timeout=(5, 60)) as response:
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data:"):
+                    event = orjson.loads(line[5:])
+                    if is_done(event):
+                        return event
+                
+                if time.monotonic() > deadline:
+                    break
+    except requests.RequestException:
+        return None
+    
+    return None
+
+
 # ==================== Main App ====================
 
 st.title("🔬 Research Assistant")
@@ -59,6 +274,20 @@ with st.sidebar:
         ["🏠 Home", "📚 Research", "💡 Explain Concept", "📝 Submit Paper", "🔍 Check Status"]
     )
     
+    # Research results are only shown on the Research page, so don't keep
+    # them alive across the rest of the session
+    if st.session_state.get("prev_page") != page:
+        st.session_state.results = None
+        st.session_state.workflow_id = None
+        st.session_state.prev_page = page
+    
+    # Only this session's results; the memoized API replies are shared by
+    # every session on the server, so they're left alone
+    if st.button("🗑 Reset session", use_container_width=True):
+        st.session_state.clear()
+        gc.collect()
+        st.rerun()
+    
     st.markdown("---")
     st.info("**Powered by:**\n- Autogen 0.4\n- Selector GroupChat\n- Azure OpenAI GPT-4o")
 
@@ -118,46 +347,52 @@ elif page == "📚 Research":
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
-                    # Poll for progress
-                    while True:
-                        try:
-                            progress_response = requests.get(
-                                f"{API_URL}/api/research/progress/{st.session_state.workflow_id}"
-                            ).json()
-                            
-                            status = progress_response.get("status")
-                            step = progress_response.get("step", "")
-                            progress = progress_response.get("progress", 0)
-                            
-                            # Update UI
-                            progress_bar.progress(progress / 100)
-                            
-                            # Update status with emoji
-                            if "Searching" in step or "papers" in step.lower():
-                                status_text.info(f"📚 {step}")
-                            elif "synthesis" in step.lower() or "Synthesizing" in step:
-                                status_text.info(f"📖 {step}")
-                            elif "extension" in step.lower() or "generating" in step.lower():
-                                status_text.info(f"🔮 {step}")
-                            else:
-                                status_text.info(f"⏳ {step}")
-                            
-                            # Check if completed
-                            if status == "completed":
-                                st.session_state.results = progress_response.get("results")
-                                status_text.success("✅ Research completed!")
-                                time.sleep(1)
-                                st.rerun()
-                                break
-                            elif status == "failed":
-                                status_text.error(f"❌ {step}")
-                                break
-                            
-                            time.sleep(2)  # Poll every 2 seconds
+                    def show_progress(progress_response: dict) -> bool:
+                        """Render one progress snapshot; True once the workflow has ended"""
+                        status = progress_response.get("status")
+                        step = progress_response.get("step", "")
+                        progress = progress_response.get("progress", 0)
+                        
+                        # Update UI
+                        progress_bar.progress(progress / 100)
+                        
+                        # Update status with emoji
+                        if "Searching" in step or "papers" in step.lower():
+                            status_text.info(f"📚 {step}")
+                        elif "synthesis" in step.lower() or "Synthesizing" in step:
+                            status_text.info(f"📖 {step}")
+                        elif "extension" in step.lower() or "generating" in step.lower():
+                            status_text.info(f"🔮 {step}")
+                        else:
+                            status_text.info(f"⏳ {step}")
+                        
+                        return status in ("completed", "failed")
+                    
+                    # Follow pushed progress; poll if the stream isn't available
+                    try:
+                        final = stream_until(
+                            f"{API_URL}/api/research/stream/{st.session_state.workflow_id}",
+                            show_progress
+                        )
+                        if final is None:
+                            final = poll_until(
+                                f"{API_URL}/api/research/progress/{st.session_state.workflow_id}",
+                                show_progress
+                            )
                         
-                        except Exception as e:
-                            st.error(f"Error tracking progress: {e}")
-                            break
+                        # Check if completed
+                        if final is None:
+                            status_text.error("❌ Timed out waiting for the workflow")
+                        elif final.get("status") == "completed":
+                            st.session_state.results = final.get("results")
+                            status_text.success("✅ Research completed!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            status_text.error(f"❌ {final.get('step', '')}")
+                    
+                    except Exception as e:
+                        st.error(f"Error tracking progress: {e}")
             else:
                 st.error("Please enter a research topic")
     
@@ -165,7 +400,7 @@ elif page == "📚 Research":
         if st.button("📚 Just Literature", use_container_width=True):
             if topic:
                 with st.spinner("Searching PubMed..."):
-                    response = call_api("/api/literature/search", {
+                    response = call_api_cached("/api/literature/search", {
                         "topic": topic,
                         "max_papers": max_papers
                     })
@@ -215,7 +450,7 @@ elif page == "💡 Explain Concept":
     if st.button("💡 Explain", type="primary"):
         if concept:
             with st.spinner("Generating explanation..."):
-                result = call_api("/api/explain", {
+                result = call_api_cached("/api/explain", {
                     "concept": concept,
                     "context": context if context else None
                 })
@@ -253,10 +488,7 @@ elif page == "📝 Submit Paper":
         if st.button("📝 Check Formatting"):
             if uploaded_file:
                 with st.spinner("Extracting text and checking formatting..."):
-                    files = {"pdf_file": uploaded_file.getvalue()}
-                    data = {"title": title_override} if title_override else {}
-                    
-                    result = upload_pdf("/api/check-paper-pdf", files, data)
+                    result = check_pdf(uploaded_file, title_override)
                     
                     if result:
                         st.markdown("### Feedback")
@@ -291,14 +523,13 @@ elif page == "📝 Submit Paper":
         if st.button("📤 Submit Paper", type="primary"):
             if all([pdf_file, title, authors, professor_email]):
                 with st.spinner("Extracting PDF and submitting paper..."):
-                    files = {"pdf_file": pdf_file.getvalue()}
                     data = {
                         "title": title,
                         "authors": authors,
                         "professor_email": professor_email
                     }
                     
-                    result = upload_pdf("/api/submit-paper-pdf", files, data)
+                    result = upload_pdf("/api/submit-paper-pdf", pdf_file, data)
                     
                     if result:
                         st.success(f"✅ {result.get('message')}")
@@ -322,9 +553,9 @@ elif page == "🔍 Check Status":
     if st.button("🔍 Check Status"):
         if submission_id:
             try:
-                response = requests.get(f"{API_URL}/api/submission/{submission_id}")
+                response = get_session().get(f"{API_URL}/api/submission/{submission_id}", timeout=STATUS_TIMEOUT)
                 response.raise_for_status()
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 st.markdown("### Submission Details")
                 col1, col2 = st.columns(2)
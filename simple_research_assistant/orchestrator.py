@@ -5,10 +5,70 @@ Research Orchestrator - FIXED VERSION
 - Working agents
 - Fast and reliable
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Hashable
 import asyncio
+import hashlib
+import io
+import json
+import logging
+import re
+from itertools import islice
+import diskcache
+import httpx
+from openai import AsyncAzureOpenAI
+from cache_utils import TTLCache
 from config import config
-from pubmed_utils import search_pubmed
+from pubmed_utils import close as close_pubmed, search_pubmed, warm_connection
+from token_utils import truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+# Sections every paper is expected to have, in reading order
+REQUIRED_SECTIONS = ("abstract", "introduction", "methods", "results", "conclusion", "references")
+
+# A heading at the start of a line, optionally numbered ("2.", "3.1",
+# "IV."), followed by end of line or punctuation so sentences that merely
+# start with the word ("Results show...") aren't counted. A short "and ..."
+# tail is allowed ("Results and Discussion"), and "Abstract" may run
+# straight into its text, as PDF extraction often leaves it
+SECTION_RE = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s*|[IVXLC]+(?:\.\s*|\s+))?"
+    r"(?:(abstract)\b"
+    r"|(introduction|materials and methods|methods?|methodology|"
+    r"results?|conclusions?|references|bibliography)"
+    r"(?:\s*(?:[:.\-\u2014]|$)|\s+and\s+[^\n]{1,40}$))",
+    re.IGNORECASE | re.MULTILINE
+)
+
+SECTION_ALIASES = {
+    "method": "methods",
+    "materials and methods": "methods",
+    "methodology": "methods",
+    "result": "results",
+    "conclusions": "conclusion",
+    "bibliography": "references",
+}
+
+
+def find_sections(text: str) -> set:
+    """
+    Names (from REQUIRED_SECTIONS) of the section headings found in text
+    
+    >>> sorted(find_sections("Abstract This paper studies X"))
+    ['abstract']
+    >>> sorted(find_sections("I. INTRODUCTION\\nIII. RESULTS"))
+    ['introduction', 'results']
+    >>> sorted(find_sections("4. Results and Discussion\\nConclusions and Future Work"))
+    ['conclusion', 'results']
+    >>> sorted(find_sections("Results show a clear effect of the treatment on outcomes."))
+    []
+    """
+    found = set()
+    for match in SECTION_RE.finditer(text):
+        name = (match.group(1) or match.group(2)).lower()
+        found.add(SECTION_ALIASES.get(name, name))
+    return found
 
 
 class ResearchOrchestrator:
@@ -19,9 +79,62 @@ class ResearchOrchestrator:
     - Direct API calls where possible
     """
     
+    # Token budgets for text quoted into prompts (cut on token boundaries)
+    SYNTHESIS_ABSTRACT_TOKENS = 80
+    EXTENSIONS_CONTEXT_TOKENS = 260
+    EXTENSIONS_ABSTRACT_TOKENS = 40
+    EXPLAIN_CONTEXT_TOKENS = 50
+    CHECK_CONTENT_TOKENS = 400
+    
     def __init__(self):
         """Initialize orchestrator"""
-        print("✅ Research Orchestrator initialized")
+        # One Azure client for every call, so its connection pool stays warm
+        self._llm = AsyncAzureOpenAI(
+            api_key=config.AZURE_OPENAI_API_KEY,
+            api_version=config.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
+            max_retries=2,
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        
+        # Replies to identical prompts are reused until they expire
+        self._cache = TTLCache(max_entries=config.CACHE_MAX_ENTRIES, ttl=config.CACHE_TTL_SECONDS)
+        
+        # LLM replies persisted across restarts (literature is persisted
+        # by pubmed_utils, in its own cache directory)
+        self._disk = diskcache.Cache(
+            config.DISK_CACHE_DIR,
+            size_limit=config.DISK_CACHE_SIZE_MB << 20
+        )
+        
+        # Caps concurrent Azure requests (per-paper synthesis fans out)
+        self._sem = asyncio.Semaphore(config.AZURE_MAX_CONCURRENCY)
+        
+        # Identical requests already running, and who wants workflow progress
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._progress_listeners: Dict[Hashable, List[Callable]] = {}
+        logger.info("Research Orchestrator initialized")
+    
+    async def warmup(self):
+        """
+        Open the PubMed and Azure connections before the first real request,
+        using the same session/client so the pooled sockets carry over
+        """
+        results = await asyncio.gather(
+            asyncio.to_thread(warm_connection),
+            self._llm.models.list(),
+            return_exceptions=True
+        )
+        for name, result in zip(("PubMed", "Azure OpenAI"), results):
+            if isinstance(result, Exception):
+                logger.warning("%s warmup failed: %s", name, result)
+        logger.debug("Connection warmup finished")
+    
+    async def aclose(self):
+        """Close the Azure client's connections and the disk caches"""
+        await self._llm.close()
+        self._disk.close()
+        close_pubmed()
     
     async def search_literature(
         self, 
@@ -41,13 +154,14 @@ class ResearchOrchestrator:
         Returns:
             Literature results
         """
-        print(f"🔍 Searching PubMed for: {topic}")
+        logger.info("Searching PubMed for: %s", topic)
         
         if progress_callback:
             progress_callback("Searching for papers", 20)
         
-        # Direct PubMed search (fast, reliable)
-        papers = search_pubmed(topic, max_papers)
+        # Direct PubMed search (fast, reliable; cached in memory and on
+        # disk by pubmed_utils)
+        papers = await asyncio.to_thread(search_pubmed, topic, max_papers)
         
         if not papers:
             return {
@@ -62,7 +176,7 @@ class ResearchOrchestrator:
         if progress_callback:
             progress_callback("Papers retrieved", 40)
         
-        print(f"✅ Found {len(papers)} papers")
+        logger.info("Found %d papers", len(papers))
         
         return {
             "papers": papers,
@@ -76,7 +190,7 @@ class ResearchOrchestrator:
         progress_callback = None
     ) -> Dict[str, Any]:
         """
-        Synthesize papers - Simple LLM call
+        Synthesize papers - one concurrent LLM call per paper
         
         Args:
             papers: List of papers to synthesize
@@ -88,62 +202,41 @@ class ResearchOrchestrator:
         if not papers:
             return {"synthesis": "No papers to synthesize", "summaries": []}
         
-        print(f"📖 Synthesizing {len(papers)} papers...")
+        logger.info("Synthesizing %d papers", len(papers))
         
         if progress_callback:
             progress_callback("Synthesizing papers", 60)
         
         # Use simple OpenAI call instead of Autogen (more reliable)
         try:
-            from openai import AzureOpenAI
-            
-            client = AzureOpenAI(
-                api_key=config.AZURE_OPENAI_API_KEY,
-                api_version=config.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=config.AZURE_OPENAI_ENDPOINT
-            )
-            
-            # Create synthesis prompt
-            papers_text = "\n\n".join([
-                f"Paper {i}: {p['title']}\nAbstract: {p.get('abstract', 'N/A')[:300]}"
-                for i, p in enumerate(papers, 1)
-            ])
-            
-            prompt = f"""Summarize these {len(papers)} research papers concisely.
-
-{papers_text}
-
-For each paper, provide:
-- Main finding (1 sentence)
-- Method used (1 sentence)
-- Significance (1 sentence)
-
-Format: Paper 1: [summary], Paper 2: [summary], ..."""
-            
-            response = client.chat.completions.create(
-                model=config.AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are a research paper summarizer. Be concise."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=1000
-            )
-            
-            synthesis = response.choices[0].message.content
+            # One request per paper, all in flight at once
+            done = 0
+            
+            async def summarize(i: int, paper: Dict) -> str:
+                nonlocal done
+                summary = await self._summarize_paper(i, paper)
+                done += 1
+                if progress_callback:
+                    progress_callback(f"Synthesis {done}/{len(papers)} complete", 60 + 20 * done // len(papers))
+                return summary
+            
+            summaries = await asyncio.gather(*(
+                summarize(i, p) for i, p in enumerate(papers, 1)
+            ))
+            synthesis = "\n\n".join(summaries)
             
             if progress_callback:
                 progress_callback("Synthesis complete", 80)
             
-            print("✅ Synthesis complete")
+            logger.debug("Synthesis complete")
             
             return {
                 "synthesis": synthesis,
-                "summaries": [{"paper": i, "summary": synthesis} for i in range(len(papers))]
+                "summaries": [{"paper": i, "summary": summary} for i, summary in enumerate(summaries)]
             }
         
         except Exception as e:
-            print(f"❌ Synthesis error: {e}")
+            logger.error("Synthesis error: %s", e)
             return {
                 "synthesis": f"Error during synthesis: {str(e)}",
                 "summaries": []
@@ -164,23 +257,20 @@ Format: Paper 1: [summary], Paper 2: [summary], ..."""
         Returns:
             Research extensions
         """
-        print("🔮 Generating research extensions...")
+        logger.info("Generating research extensions")
         
         if progress_callback:
             progress_callback("Generating research extensions", 90)
         
         try:
-            from openai import AzureOpenAI
-            
-            client = AzureOpenAI(
-                api_key=config.AZURE_OPENAI_API_KEY,
-                api_version=config.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=config.AZURE_OPENAI_ENDPOINT
-            )
-            
             # Extract context
             if isinstance(papers_or_synthesis, dict):
                 context = papers_or_synthesis.get('synthesis', '')
+            elif isinstance(papers_or_synthesis, list):
+                context = "\n".join(
+                    f"- {p['title']}: {truncate_tokens(p.get('abstract') or 'N/A', self.EXTENSIONS_ABSTRACT_TOKENS)}"
+                    for p in papers_or_synthesis
+                )
             elif isinstance(papers_or_synthesis, str):
                 context = papers_or_synthesis
             else:
@@ -188,7 +278,7 @@ Format: Paper 1: [summary], Paper 2: [summary], ..."""
             
             prompt = f"""Based on this research summary:
 
-{context[:1000]}
+{truncate_tokens(context, self.EXTENSIONS_CONTEXT_TOKENS)}
 
 Generate 3 future research directions. For each provide:
 1. Title (brief)
@@ -198,22 +288,17 @@ Generate 3 future research directions. For each provide:
 
 Format clearly with numbers."""
             
-            response = client.chat.completions.create(
-                model=config.AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are a research strategist. Propose innovative extensions."},
-                    {"role": "user", "content": prompt}
-                ],
+            extensions = await self._chat(
+                "You are a research strategist. Propose innovative extensions.",
+                prompt,
                 temperature=0.7,
-                max_tokens=800
+                max_tokens=600
             )
             
-            extensions = response.choices[0].message.content
-            
             if progress_callback:
                 progress_callback("Extensions generated", 100)
             
-            print("✅ Extensions generated")
+            logger.debug("Extensions generated")
             
             return {
                 "extensions": extensions,
@@ -221,7 +306,7 @@ Format clearly with numbers."""
             }
         
         except Exception as e:
-            print(f"❌ Extensions error: {e}")
+            logger.error("Extensions error: %s", e)
             return {
                 "extensions": f"Error generating extensions: {str(e)}",
                 "count": 0
@@ -242,17 +327,9 @@ Format clearly with numbers."""
         Returns:
             Simple explanation
         """
-        print(f"💡 Explaining: {concept}")
+        logger.info("Explaining: %s", concept)
         
         try:
-            from openai import AzureOpenAI
-            
-            client = AzureOpenAI(
-                api_key=config.AZURE_OPENAI_API_KEY,
-                api_version=config.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=config.AZURE_OPENAI_ENDPOINT
-            )
-            
             prompt = f"""Explain the concept '{concept}' in simple terms.
 
 Include:
@@ -264,26 +341,21 @@ Include:
 Max 200 words. Be clear and accessible."""
             
             if context:
-                prompt += f"\n\nContext: {context[:200]}"
+                prompt += f"\n\nContext: {truncate_tokens(context, self.EXPLAIN_CONTEXT_TOKENS)}"
             
-            response = client.chat.completions.create(
-                model=config.AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are a concept explainer. Use simple language."},
-                    {"role": "user", "content": prompt}
-                ],
+            explanation = await self._chat(
+                "You are a concept explainer. Use simple language.",
+                prompt,
                 temperature=0.6,
-                max_tokens=500
+                max_tokens=350
             )
             
-            explanation = response.choices[0].message.content
-            
-            print("✅ Explanation generated")
+            logger.debug("Explanation generated")
             
             return explanation
         
         except Exception as e:
-            print(f"❌ Explanation error: {e}")
+            logger.error("Explanation error: %s", e)
             return f"Error explaining concept: {str(e)}"
     
     async def check_paper(
@@ -301,59 +373,57 @@ Max 200 words. Be clear and accessible."""
         Returns:
             Formatting feedback
         """
-        print(f"📝 Checking paper: {title}")
+        logger.info("Checking paper: %s", title)
+        
+        # Section presence is a pattern match; no LLM needed for it
+        sections = find_sections(content)
+        missing = [name for name in REQUIRED_SECTIONS if name not in sections]
+        score = round(100 * (len(REQUIRED_SECTIONS) - len(missing)) / len(REQUIRED_SECTIONS))
+        
+        checklist = "\n".join(
+            f"{i}. {name.title()} ({'present' if name in sections else 'missing'})"
+            for i, name in enumerate(REQUIRED_SECTIONS, 1)
+        )
+        summary = f"""Score: {score}/100
+
+{checklist}
+
+Missing sections: {', '.join(name.title() for name in missing) or 'None'}"""
         
-        try:
-            from openai import AzureOpenAI
-            
-            client = AzureOpenAI(
-                api_key=config.AZURE_OPENAI_API_KEY,
-                api_version=config.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=config.AZURE_OPENAI_ENDPOINT
-            )
-            
-            # Only check first 1500 chars for speed
-            content_preview = content[:1500]
+        result = {"score": score, "missing_sections": missing}
+        
+        if not missing:
+            feedback = f"{summary}\n\nAll required sections are present."
+        else:
+            # Only the recommendations need the LLM
+            content_preview = truncate_tokens(content, self.CHECK_CONTENT_TOKENS)
             
-            prompt = f"""Review this research paper for formatting:
+            prompt = f"""This research paper is missing these sections: {', '.join(missing)}.
+Give 3 quick, specific recommendations to fix its formatting.
 
 Title: {title}
 
 Content (preview):
-{content_preview}
-
-Check for:
-1. Abstract (present/missing)
-2. Introduction (present/missing)
-3. Methods (present/missing)
-4. Results (present/missing)
-5. Conclusion (present/missing)
-6. References (present/missing)
-
-Provide:
-- Score (0-100)
-- Missing sections
-- 3 quick recommendations"""
-            
-            response = client.chat.completions.create(
-                model=config.AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are a paper formatting checker. Be specific."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
-            
-            feedback = response.choices[0].message.content
-            
-            print("✅ Paper checked")
-            
-            return {"feedback": feedback}
-        
-        except Exception as e:
-            print(f"❌ Paper check error: {e}")
-            return {"feedback": f"Error checking paper: {str(e)}"}
+{content_preview}"""
+            
+            try:
+                recommendations = await self._chat(
+                    "You are a paper formatting checker. Be specific.",
+                    prompt,
+                    temperature=0.3,
+                    max_tokens=200
+                )
+                feedback = f"{summary}\n\nRecommendations:\n{recommendations}"
+            except Exception as e:
+                # The score and checklist still stand; "error" keeps the
+                # reply out of the result caches
+                logger.error("Paper check error: %s", e)
+                feedback = f"{summary}\n\nNote: recommendations unavailable ({e})"
+                result["error"] = str(e)
+        
+        logger.debug("Paper checked")
+        
+        return {"feedback": feedback, **result}
     
     async def run_full_workflow(
         self,
@@ -372,7 +442,35 @@ Provide:
         Returns:
             Complete results
         """
-        print(f"\n🔬 Starting full research workflow: {topic}\n")
+        # Concurrent requests for the same workflow share one run, and
+        # every caller gets that run's progress updates
+        key = ("workflow", " ".join(topic.lower().split()), max_papers)
+        listeners = self._progress_listeners.setdefault(key, [])
+        if progress_callback:
+            listeners.append(progress_callback)
+        
+        def broadcast(step, progress):
+            for callback in list(listeners):
+                callback(step, progress)
+        
+        try:
+            return await self._coalesce(
+                key, lambda: self._run_full_workflow(topic, max_papers, broadcast)
+            )
+        finally:
+            if progress_callback:
+                listeners.remove(progress_callback)
+            if not listeners:
+                self._progress_listeners.pop(key, None)
+    
+    async def _run_full_workflow(
+        self,
+        topic: str,
+        max_papers: int,
+        progress_callback
+    ) -> Dict[str, Any]:
+        """Body of run_full_workflow (one run per distinct in-flight request)"""
+        logger.info("Starting full research workflow: %s", topic)
         
         # Step 1: Literature
         lit_result = await self.search_literature(topic, max_papers, progress_callback)
@@ -386,16 +484,24 @@ Provide:
                 "status": "completed_with_no_results"
             }
         
-        # Step 2: Synthesis
-        syn_result = await self.synthesize_papers(lit_result['papers'], progress_callback)
-        
-        # Step 3: Extensions
-        ext_result = await self.generate_extensions(syn_result, progress_callback)
+        # Steps 2+3: Synthesis and Extensions side by side. Extensions work
+        # from the papers themselves, so they need not wait for the summaries
+        fractions = {}
+        syn_result, ext_result = await asyncio.gather(
+            self.synthesize_papers(
+                lit_result['papers'],
+                self._stage_progress(progress_callback, fractions, "synthesis", 60, 80)
+            ),
+            self.generate_extensions(
+                lit_result['papers'],
+                self._stage_progress(progress_callback, fractions, "extensions", 90, 100)
+            )
+        )
         
         if progress_callback:
             progress_callback("Workflow completed", 100)
         
-        print("\n✅ Full workflow completed!\n")
+        logger.info("Full workflow completed: %s", topic)
         
         return {
             "topic": topic,
@@ -405,20 +511,113 @@ Provide:
             "status": "completed"
         }
     
+    def _stage_progress(
+        self,
+        progress_callback,
+        fractions: Dict[str, float],
+        stage: str,
+        start: int,
+        end: int
+    ):
+        """
+        Map one of the two concurrent stages' own progress range (start-end)
+        onto the shared 40-96% band, so together they report a single
+        rising value; fractions holds each stage's completion
+        """
+        if progress_callback is None:
+            return None
+        
+        def report(step, progress):
+            fractions[stage] = min(max((progress - start) / (end - start), 0.0), 1.0)
+            progress_callback(step, 40 + round(28 * sum(fractions.values())))
+        
+        return report
+    
+    async def _summarize_paper(self, index: int, paper: Dict) -> str:
+        """Summarize a single paper"""
+        prompt = f"""Summarize this research paper concisely. Provide:
+- Main finding (1 sentence)
+- Method used (1 sentence)
+- Significance (1 sentence)
+
+Paper {index}: {paper['title']}
+Abstract: {truncate_tokens(paper.get('abstract') or 'N/A', self.SYNTHESIS_ABSTRACT_TOKENS)}"""
+        
+        summary = await self._chat(
+            "You are a research paper summarizer. Be concise.",
+            prompt,
+            temperature=0.5,
+            max_tokens=200
+        )
+        return f"Paper {index}: {summary}"
+    
+    async def _chat(self, system: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """One system + user completion, memoized on the full request"""
+        key = self._disk_key("chat", config.AZURE_OPENAI_DEPLOYMENT, system, prompt, temperature, max_tokens)
+        reply = self._cache.get(key)
+        if reply is None:
+            # diskcache is blocking SQLite + file I/O, so keep it off the loop
+            reply = await asyncio.to_thread(self._disk.get, key)
+            if reply is not None:
+                self._cache.set(key, reply)
+        if reply is None:
+            reply = await self._coalesce(
+                key, lambda: self._complete(system, prompt, temperature, max_tokens)
+            )
+            self._cache.set(key, reply)
+            await asyncio.to_thread(self._disk.set, key, reply, expire=config.DISK_CACHE_TTL_SECONDS)
+        return reply
+    
+    async def _complete(self, system: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Uncached completion request to Azure"""
+        async with self._sem:
+            response = await self._llm.chat.completions.create(
+                model=config.AZURE_OPENAI_DEPLOYMENT,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        return response.choices[0].message.content
+    
+    async def _coalesce(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Share one in-flight run of coro_factory() between concurrent calls
+        with the same key; the entry is dropped as soon as the run finishes
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield so one cancelled caller does not cancel the shared run
+        return await asyncio.shield(task)
+    
+    def _disk_key(self, *parts) -> str:
+        """Stable cache key for JSON-serializable parts"""
+        return hashlib.blake2b(json.dumps(parts).encode()).hexdigest()
+    
     def _format_papers(self, papers: List[Dict]) -> str:
         """Format papers for display"""
-        result = []
+        buf = io.StringIO()
+        write = buf.write
         for i, paper in enumerate(papers, 1):
-            result.append(f"""
+            authors = paper.get('authors_short') or ", ".join(islice(paper.get('authors') or (), 3))
+            if i > 1:
+                write("\n")
+            write(f"""
 **Paper {i}: {paper['title']}**
-- Authors: {', '.join(paper['authors'][:3])}
+- Authors: {authors}
 - Journal: {paper['journal']}
 - Date: {paper['pubdate']}
 - Link: {paper['link']}
 - DOI: {paper['doi']}
 """)
         
-        return "\n".join(result)
+        return buf.getvalue()
 
 
 # Global instance
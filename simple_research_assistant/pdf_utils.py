@@ -1,56 +1,96 @@
 """
 PDF Utilities for extracting text from uploaded PDFs
 """
+import fitz  # PyMuPDF
 import pdfplumber
 from PyPDF2 import PdfReader
-from io import BytesIO
+from io import BytesIO, StringIO
+from typing import Iterable, Optional
 
 
-def extract_text_from_pdf(pdf_file) -> str:
+def extract_text_from_pdf(pdf_file, max_chars: Optional[int] = None) -> str:
     """
     Extract text from PDF file
     
     Args:
         pdf_file: File-like object or bytes
+        max_chars: Stop after the page that reaches this many characters
         
     Returns:
         Extracted text as string
     """
     try:
-        # Try pdfplumber first (better text extraction)
-        text = extract_with_pdfplumber(pdf_file)
+        # Try PyMuPDF first (C extractor, no layout analysis)
+        text = extract_with_pymupdf(pdf_file, max_chars)
+        if text.strip():
+            return text
+        
+        # Then pdfplumber (slower, but handles some odd encodings)
+        text = extract_with_pdfplumber(pdf_file, max_chars)
         if text.strip():
             return text
         
         # Fallback to PyPDF2
-        text = extract_with_pypdf2(pdf_file)
+        text = extract_with_pypdf2(pdf_file, max_chars)
         return text
     
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
 
-def extract_with_pdfplumber(pdf_file) -> str:
+def _join_pages(page_texts: Iterable[Optional[str]], max_chars: Optional[int]) -> str:
+    """Join page texts, pulling no more pages once max_chars is reached"""
+    buf = StringIO()
+    total = 0
+    for page_text in page_texts:
+        if not page_text:
+            continue
+        if total:
+            buf.write("\n\n")
+        buf.write(page_text)
+        total += len(page_text)
+        if max_chars and total >= max_chars:
+            break
+    
+    return buf.getvalue()
+
+
+def extract_with_pymupdf(pdf_file, max_chars: Optional[int] = None) -> str:
+    """Extract text using PyMuPDF"""
+    try:
+        # fitz reads bytes directly, no BytesIO wrapper needed
+        if isinstance(pdf_file, bytes):
+            pdf_bytes = pdf_file
+        else:
+            pdf_file.seek(0)
+            pdf_bytes = pdf_file.read()
+        
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return _join_pages((page.get_text("text") for page in doc), max_chars)
+    
+    except Exception as e:
+        print(f"PyMuPDF extraction failed: {e}")
+        return ""
+
+
+def extract_with_pdfplumber(pdf_file, max_chars: Optional[int] = None) -> str:
     """Extract text using pdfplumber"""
     try:
         if isinstance(pdf_file, bytes):
             pdf_file = BytesIO(pdf_file)
+        elif hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
         
-        text_parts = []
+        # Pages are only parsed as the generator is consumed
         with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-        
-        return "\n\n".join(text_parts)
+            return _join_pages((page.extract_text() for page in pdf.pages), max_chars)
     
     except Exception as e:
         print(f"pdfplumber extraction failed: {e}")
         return ""
 
 
-def extract_with_pypdf2(pdf_file) -> str:
+def extract_with_pypdf2(pdf_file, max_chars: Optional[int] = None) -> str:
     """Extract text using PyPDF2 as fallback"""
     try:
         if isinstance(pdf_file, bytes):
@@ -59,14 +99,7 @@ def extract_with_pypdf2(pdf_file) -> str:
             pdf_file.seek(0)  # Reset file pointer
         
         reader = PdfReader(pdf_file)
-        text_parts = []
-        
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        
-        return "\n\n".join(text_parts)
+        return _join_pages((page.extract_text() for page in reader.pages), max_chars)
     
     except Exception as e:
         print(f"PyPDF2 extraction failed: {e}")
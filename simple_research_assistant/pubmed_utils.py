@@ -1,14 +1,71 @@
 """
 Simple PubMed Search Utility - OPTIMIZED
 """
+import asyncio
+import contextlib
+import io
+import logging
+import re
+import threading
+import diskcache
+import httpx
+import orjson
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree as ET
+from typing import Iterator, List, Dict, Optional
+from cache_utils import TTLCache
 from config import config
 
+logger = logging.getLogger(__name__)
+
+# One session for every E-utilities call, so its keep-alive sockets are
+# reused (pool sized for concurrent searches from the worker threads);
+# throttling and transient server errors are retried with backoff
+_session = requests.Session()
+_session.headers["User-Agent"] = "research_assistants/1.0"
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# E-utilities endpoints, resolved once
+_BASE_URL = config.PUBMED_BASE_URL
+_SEARCH_URL = f"{_BASE_URL}esearch.fcgi"
+_FETCH_URL = f"{_BASE_URL}efetch.fcgi"
+_EMAIL = config.PUBMED_EMAIL
+
+# Concurrent E-utilities requests for async searches (NCBI allows 3/s
+# without an API key)
+PUBMED_MAX_CONCURRENCY = 3
+
+# Per-article field lookups, compiled once; string() results are plain
+# str ("" when the element is missing), so no None checks are needed.
+# smart_strings=False keeps results from holding a reference to the tree
+_XP_PMID = ET.XPath("string(MedlineCitation/PMID)", smart_strings=False)
+_XP_TITLE = ET.XPath("string(MedlineCitation/Article/ArticleTitle)", smart_strings=False)
+_XP_LASTNAMES = ET.XPath("MedlineCitation/Article/AuthorList/Author[position() <= 3]/LastName")
+_XP_ABSTRACT = ET.XPath("MedlineCitation/Article/Abstract/AbstractText")
+_XP_TEXT = ET.XPath("normalize-space()", smart_strings=False)
+_XP_JOURNAL = ET.XPath("string(MedlineCitation/Article/Journal/Title)", smart_strings=False)
+_XP_YEAR = ET.XPath("string(MedlineCitation/Article/Journal/JournalIssue/PubDate/Year)", smart_strings=False)
+_XP_DOI = ET.XPath('string(MedlineCitation/Article/ELocationID[@EIdType="doi"])', smart_strings=False)
+
+# Recent search results, keyed by normalized query (shared across threads)
+_search_cache = TTLCache(max_entries=config.CACHE_MAX_ENTRIES, ttl=config.CACHE_TTL_SECONDS)
+_search_cache_lock = threading.Lock()
+
+# Persists across restarts: query -> PMIDs (short TTL, rankings move) and
+# PMID -> parsed paper (long TTL, records rarely change)
+_disk = diskcache.Cache(config.PUBMED_CACHE_DIR, size_limit=config.PUBMED_CACHE_SIZE_MB << 20)
+
 
 def search_pubmed(query: str, max_results: int = 5) -> List[Dict]:
     """
     Search PubMed for papers - OPTIMIZED with abstracts
+    Results are cached per normalized query (case and whitespace folded)
     
     Args:
         query: Search query
@@ -17,132 +74,402 @@ def search_pubmed(query: str, max_results: int = 5) -> List[Dict]:
     Returns:
         List of paper dictionaries with abstracts
     """
-    try:
-        # Step 1: Search for IDs
-        search_url = f"{config.PUBMED_BASE_URL}esearch.fcgi"
-        search_params = {
-            "db": "pubmed",
-            "term": query,
-            "retmax": max_results,
-            "retmode": "json",
-            "sort": "relevance",
-            "email": config.PUBMED_EMAIL
-        }
-        
-        response = requests.get(search_url, params=search_params, timeout=10)
-        response.raise_for_status()
-        search_data = response.json()
+    key = _cache_key(query, max_results)
+    papers = _cache_get(key)
+    if papers is None:
+        papers = _search_pubmed(query, max_results)
+        _cache_set(key, papers)
+    
+    return list(papers)
+
+
+async def asearch_pubmed(
+    query: str,
+    max_results: int = 5,
+    client: Optional[httpx.AsyncClient] = None,
+    sem: Optional[asyncio.Semaphore] = None
+) -> List[Dict]:
+    """
+    Async search_pubmed (same cache, read and written off the event loop)
+    
+    To run several searches concurrently, pass one client (see
+    async_client) and one semaphore, e.g.
+    asyncio.Semaphore(PUBMED_MAX_CONCURRENCY), and gather the calls
+    """
+    key = _cache_key(query, max_results)
+    papers = await asyncio.to_thread(_cache_get, key)
+    if papers is None:
+        if client is None:
+            async with async_client() as client:
+                papers = await _asearch_pubmed(query, max_results, client, sem)
+        else:
+            papers = await _asearch_pubmed(query, max_results, client, sem)
+        await asyncio.to_thread(_cache_set, key, papers)
+    
+    return list(papers)
+
+
+async def asearch_pubmed_many(queries: List[str], max_results: int = 5) -> Dict[str, List[Dict]]:
+    """
+    Search PubMed for several queries with a single efetch
+    
+    The esearch lookups run concurrently; the union of their PMIDs is
+    fetched in one request and split back per query (in relevance order).
+    Cached queries are answered without any request.
+    
+    Returns:
+        {query: list of paper dictionaries}
+    """
+    # Cache lookups hit disk, so they go to a worker thread (one hop for all)
+    unique = list(dict.fromkeys(queries))
+    cached = await asyncio.to_thread(
+        lambda: [_cache_get(_cache_key(query, max_results)) for query in unique]
+    )
+    
+    results: Dict[str, List[Dict]] = {}
+    pending = []
+    for query, papers in zip(unique, cached):
+        if papers is None:
+            pending.append(query)
+        else:
+            results[query] = list(papers)
+    
+    if not pending:
+        return results
+    
+    sem = asyncio.Semaphore(PUBMED_MAX_CONCURRENCY)
+    async with async_client() as client:
+        id_lists = await asyncio.gather(
+            *(_aesearch_ids(query, max_results, client, sem) for query in pending),
+            return_exceptions=True
+        )
         
-        ids = search_data.get("esearchresult", {}).get("idlist", [])
+        for ids in id_lists:
+            if isinstance(ids, Exception):
+                logger.warning("PubMed search error: %s", ids)
+        id_lists = [[] if isinstance(ids, Exception) else ids for ids in id_lists]
+        all_ids = list(dict.fromkeys(pmid for ids in id_lists for pmid in ids))
         
+        by_pmid = {}
+        if all_ids:
+            try:
+                papers = await _aefetch_papers(all_ids, client, sem)
+                by_pmid = {paper["pmid"]: paper for paper in papers}
+            except Exception as e:
+                logger.warning("PubMed fetch error: %s", e)
+    
+    fetched = {
+        query: [by_pmid[pmid] for pmid in ids if pmid in by_pmid]
+        for query, ids in zip(pending, id_lists)
+    }
+    await asyncio.to_thread(
+        lambda: [_cache_set(_cache_key(query, max_results), papers) for query, papers in fetched.items()]
+    )
+    
+    results.update((query, list(papers)) for query, papers in fetched.items())
+    return results
+
+
+def async_client() -> httpx.AsyncClient:
+    """
+    HTTP client for asearch_pubmed (same User-Agent as the sync session)
+    
+    Speaks HTTP/2, so concurrent esearch/efetch calls multiplex over one
+    connection instead of opening one each. Only the User-Agent is copied:
+    the session's defaults include Connection: keep-alive, which HTTP/2
+    forbids, and httpx sets its own Accept-Encoding
+    """
+    return httpx.AsyncClient(
+        headers={"User-Agent": _session.headers["User-Agent"]},
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        # With an explicit transport, http2 and limits must be set on it
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+        )
+    )
+
+
+def close():
+    """Close the disk cache and the session's connections"""
+    _disk.close()
+    _session.close()
+
+
+def warm_connection():
+    """Open the session's connection to E-utilities ahead of the first search"""
+    _session.head(_BASE_URL, timeout=5)
+
+
+def _cache_key(query: str, max_results: int):
+    """Cache key with case and whitespace folded"""
+    return (re.sub(r"\s+", " ", query).strip().lower(), max_results)
+
+
+def _cache_get(key):
+    """Cached papers for key (memory, then disk), or None"""
+    with _search_cache_lock:
+        papers = _search_cache.get(key)
+    if papers is not None:
+        return papers
+    
+    ids = _disk.get(("q",) + key)
+    if ids is None:
+        return None
+    
+    cached, missing = _disk_papers(ids)
+    if missing:
+        return None
+    
+    papers = [cached[pmid] for pmid in ids]
+    with _search_cache_lock:
+        _search_cache.set(key, papers)
+    return papers
+
+
+def _cache_set(key, papers: List[Dict]):
+    """Cache papers for key (the papers themselves are stored on fetch)"""
+    # Empty results may be a transient error, so only cache hits
+    if papers:
+        with _search_cache_lock:
+            _search_cache.set(key, papers)
+        _disk.set(("q",) + key, [p["pmid"] for p in papers], expire=config.CACHE_TTL_SECONDS)
+
+
+def _disk_papers(ids: List[str]):
+    """
+    Look PMIDs up in the disk cache
+    
+    Returns:
+        ({pmid: paper} for the cached ones, [uncached PMIDs])
+    """
+    cached = {}
+    missing = []
+    for pmid in ids:
+        paper = _disk.get(("pmid", pmid))
+        if paper is None:
+            missing.append(pmid)
+        else:
+            cached[pmid] = paper
+    return cached, missing
+
+
+def _store_papers(papers: List[Dict]):
+    """Persist freshly fetched papers by PMID"""
+    for paper in papers:
+        _disk.set(("pmid", paper["pmid"]), paper, expire=config.DISK_CACHE_TTL_SECONDS)
+
+
+def _esearch_params(query: str, max_results: int) -> Dict:
+    """Query string for an esearch ID lookup"""
+    return {
+        "db": "pubmed",
+        "term": query,
+        "retmax": max_results,
+        "retmode": "json",
+        "sort": "relevance",
+        "email": _EMAIL
+    }
+
+
+def _efetch_params(ids: List[str]) -> Dict:
+    """Query string for an efetch of full records with abstracts"""
+    return {
+        "db": "pubmed",
+        "id": ",".join(ids),
+        "retmode": "xml",
+        "rettype": "abstract",
+        "email": _EMAIL
+    }
+
+
+def _search_pubmed(query: str, max_results: int) -> List[Dict]:
+    """Uncached PubMed search (esearch for IDs, then efetch for details)"""
+    try:
+        ids = _esearch_ids(query, max_results)
         if not ids:
             return []
         
-        # Step 2: Fetch details with abstracts
-        fetch_url = f"{config.PUBMED_BASE_URL}efetch.fcgi"
-        fetch_params = {
-            "db": "pubmed",
-            "id": ",".join(ids),
-            "retmode": "xml",
-            "rettype": "abstract",
-            "email": config.PUBMED_EMAIL
-        }
-        
-        response = requests.get(fetch_url, params=fetch_params, timeout=15)
-        response.raise_for_status()
-        
-        # Parse XML
-        papers = parse_pubmed_xml(response.text)
-        
-        return papers
+        return _efetch_papers(ids)
     
     except Exception as e:
-        print(f"PubMed search error: {e}")
+        logger.warning("PubMed search error: %s", e)
         return []
 
 
-def parse_pubmed_xml(xml_text: str) -> List[Dict]:
-    """Parse PubMed XML response"""
-    import xml.etree.ElementTree as ET
-    
-    papers = []
+def _esearch_ids(query: str, max_results: int) -> List[str]:
+    """PMIDs matching query, most relevant first"""
+    response = _session.get(
+        _SEARCH_URL,
+        params=_esearch_params(query, max_results),
+        timeout=10
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content).get("esearchresult", {}).get("idlist", [])
+
+
+def _efetch_papers(ids: List[str]) -> List[Dict]:
+    """
+    Full records (with abstracts) for PMIDs, in the order given
+    Only PMIDs missing from the disk cache are fetched
+    """
+    cached, missing = _disk_papers(ids)
+    if missing:
+        response = _session.get(
+            _FETCH_URL,
+            params=_efetch_params(missing),
+            timeout=15
+        )
+        response.raise_for_status()
+        papers = parse_pubmed_xml(response.content)
+        _store_papers(papers)
+        cached.update((p["pmid"], p) for p in papers)
     
+    return [cached[pmid] for pmid in ids if pmid in cached]
+
+
+async def _asearch_pubmed(
+    query: str,
+    max_results: int,
+    client: httpx.AsyncClient,
+    sem: Optional[asyncio.Semaphore]
+) -> List[Dict]:
+    """Uncached async PubMed search"""
     try:
-        root = ET.fromstring(xml_text)
+        ids = await _aesearch_ids(query, max_results, client, sem)
+        if not ids:
+            return []
         
-        for article in root.findall('.//PubmedArticle'):
-            try:
-                # Get article data
-                medline = article.find('.//MedlineCitation')
-                article_elem = medline.find('.//Article')
-                
-                # PMID
-                pmid = medline.find('.//PMID').text
-                
-                # Title
-                title = article_elem.find('.//ArticleTitle').text or ""
-                
-                # Authors
-                authors = []
-                author_list = article_elem.find('.//AuthorList')
-                if author_list is not None:
-                    for author in author_list.findall('.//Author')[:3]:
-                        lastname = author.find('.//LastName')
-                        forename = author.find('.//ForeName')
-                        if lastname is not None:
-                            name = lastname.text
-                            if forename is not None:
-                                name = f"{forename.text} {name}"
-                            authors.append(name)
-                
-                # Abstract
-                abstract = ""
-                abstract_elem = article_elem.find('.//Abstract/AbstractText')
-                if abstract_elem is not None:
-                    abstract = abstract_elem.text or ""
-                
-                # Journal
-                journal = ""
-                journal_elem = article_elem.find('.//Journal/Title')
-                if journal_elem is not None:
-                    journal = journal_elem.text or ""
-                
-                # Publication date
-                pubdate = ""
-                pubdate_elem = article_elem.find('.//Journal/JournalIssue/PubDate/Year')
-                if pubdate_elem is not None:
-                    pubdate = pubdate_elem.text
-                
-                # DOI
-                doi = ""
-                for eloc in article_elem.findall('.//ELocationID'):
-                    if eloc.get('EIdType') == 'doi':
-                        doi = eloc.text
-                        break
-                
-                paper = {
-                    "pmid": pmid,
-                    "title": title,
-                    "authors": authors if authors else ["Unknown"],
-                    "abstract": abstract,
-                    "journal": journal,
-                    "pubdate": pubdate,
-                    "link": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
-                    "doi": doi
-                }
-                papers.append(paper)
-            
-            except Exception as e:
-                print(f"Error parsing article: {e}")
-                continue
+        return await _aefetch_papers(ids, client, sem)
+    
+    except Exception as e:
+        logger.warning("PubMed search error: %s", e)
+        return []
+
+
+async def _aesearch_ids(
+    query: str,
+    max_results: int,
+    client: httpx.AsyncClient,
+    sem: Optional[asyncio.Semaphore]
+) -> List[str]:
+    """Async _esearch_ids; the request holds sem while in flight"""
+    async with sem or contextlib.nullcontext():
+        response = await client.get(
+            _SEARCH_URL,
+            params=_esearch_params(query, max_results),
+            timeout=10
+        )
+    response.raise_for_status()
+    return orjson.loads(response.content).get("esearchresult", {}).get("idlist", [])
+
+
+async def _aefetch_papers(
+    ids: List[str],
+    client: httpx.AsyncClient,
+    sem: Optional[asyncio.Semaphore]
+) -> List[Dict]:
+    """
+    Async _efetch_papers; the IDs are POSTed since a long list can
+    outgrow the URL limit
+    """
+    cached, missing = await asyncio.to_thread(_disk_papers, ids)
+    if missing:
+        async with sem or contextlib.nullcontext():
+            response = await client.post(
+                _FETCH_URL,
+                data=_efetch_params(missing)
+            )
+        response.raise_for_status()
         
-        return papers
+        # Parsing is CPU-bound; keep it off the event loop
+        papers = await asyncio.to_thread(parse_pubmed_xml, response.content)
+        await asyncio.to_thread(_store_papers, papers)
+        cached.update((p["pmid"], p) for p in papers)
+    
+    return [cached[pmid] for pmid in ids if pmid in cached]
+
+
+def parse_pubmed_xml(xml_bytes: bytes) -> List[Dict]:
+    """Parse PubMed XML response (all of iter_pubmed_xml, [] on bad XML)"""
+    try:
+        return list(iter_pubmed_xml(xml_bytes))
     
     except Exception as e:
-        print(f"XML parsing error: {e}")
+        logger.warning("XML parsing error: %s", e)
         return []
 
 
-# Add to config if not present
-if not hasattr(config, 'PUBMED_BASE_URL'):
-    config.PUBMED_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+def iter_pubmed_xml(xml_bytes: bytes) -> Iterator[Dict]:
+    """
+    Yield papers from a PubMed XML response as they are parsed
+    
+    Articles are stream-parsed and freed as soon as their fields are read,
+    so only one article's tree is held at a time; a consumer that stops
+    early (e.g. islice) never parses the rest
+    
+    Raises:
+        lxml.etree.XMLSyntaxError on malformed XML
+    """
+    # libxml2 decodes the bytes itself; no entity expansion from
+    # network input and no xml:id table (nothing looks IDs up)
+    context = ET.iterparse(
+        io.BytesIO(xml_bytes),
+        events=("end",),
+        tag="PubmedArticle",
+        huge_tree=False,
+        remove_blank_text=True,
+        resolve_entities=False,
+        collect_ids=False
+    )
+    
+    for _, article in context:
+        # string() lookups yield "" for missing nodes, so a sparse record
+        # can't raise here and needs no per-article guard
+        paper = _parse_article(article)
+        
+        # Drop the finished article and any earlier siblings
+        article.clear()
+        while article.getprevious() is not None:
+            del article.getparent()[0]
+        
+        if paper is not None:
+            yield paper
+
+
+def _parse_article(article) -> Optional[Dict]:
+    """Paper dictionary for one PubmedArticle element (None without a PMID)"""
+    pmid = _XP_PMID(article)
+    if not pmid:
+        return None
+    
+    # Authors (first three listed; entries without a last name are
+    # skipped). ForeName directly follows LastName in the DTD, so
+    # it's found by sibling step rather than another XPath call
+    authors = []
+    for last in _XP_LASTNAMES(article):
+        if not last.text:
+            continue
+        fore = last.getnext()
+        if fore is not None and fore.tag == "ForeName" and fore.text:
+            authors.append(f"{fore.text} {last.text}")
+        else:
+            authors.append(last.text)
+    
+    if not authors:
+        authors = ["Unknown"]
+    
+    return {
+        "pmid": pmid,
+        "title": _XP_TITLE(article),
+        "authors": authors,
+        # Display form, joined once here instead of on every render
+        "authors_short": ", ".join(authors),
+        # Structured abstracts have one AbstractText per section
+        "abstract": " ".join(map(_XP_TEXT, _XP_ABSTRACT(article))),
+        "journal": _XP_JOURNAL(article),
+        "pubdate": _XP_YEAR(article),
+        "link": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+        "doi": _XP_DOI(article)
+    }
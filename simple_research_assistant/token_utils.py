@@ -0,0 +1,32 @@
+"""
+Token-aware text helpers (tiktoken)
+"""
+from functools import lru_cache
+
+import tiktoken
+
+from config import config
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = config.AZURE_OPENAI_DEPLOYMENT) -> tiktoken.Encoding:
+    """Get the tokenizer for a model, falling back to the GPT-4o encoding"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Azure deployment names are free-form; GPT-4o uses o200k_base
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in text"""
+    return len(get_encoding().encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens (on a token boundary)"""
+    enc = get_encoding()
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])